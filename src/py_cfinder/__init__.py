@@ -1,5 +1,6 @@
-
+from py_cfinder.approximation import approximate
 from py_cfinder.cfinder import CFinder
+from py_cfinder.matching import compare
+from py_cfinder.incremental import IncrementalCFinder
 
 __version__ = '0.1.0'
-
@@ -0,0 +1,203 @@
+import random
+
+from collections import defaultdict
+
+from py_cfinder.percolation import build_adjacency
+from py_cfinder.percolation import maximal_cliques
+from py_cfinder.percolation import percolate
+
+
+def approximate(edges, k=3, samples=1000, radius=1, max_neighbours=None,
+                confidence=0.95, bootstrap=200, seed=None):
+    """approximate
+    Estimates the 'membership_distribution' and 'size_distribution' results
+    of `CFinder.load` from a sample of vertices, without running CFinder.
+
+    For each sampled vertex the ego-network within radius steps is taken,
+    its maximal cliques are found and percolated locally, and the k-clique
+    communities containing the vertex are counted and measured. Membership
+    counts are scaled up from the sample. Community sizes are weighted by
+    the inverse of their size, as a community of size s is s times as
+    likely as a single vertex to be hit by the sample. Confidence intervals
+    come from bootstrapping the sampled vertices.
+
+    The estimates are biased in known directions: communities that only
+    join up outside the ego-network are counted separately, so membership
+    is overestimated, and communities are truncated to the ego-network, so
+    sizes are underestimated. A larger radius reduces both at a higher
+    cost. Runtime grows with samples, radius and max_neighbours.
+
+    Args:
+        edges (str or iterable): Path of an edge list file in CFinder's
+            input format, or edges as (source, target) or
+            (source, target, weight) tuples. Weights are ignored.
+        k (int): The k-clique size. Defaults to 3.
+        samples (int): Number of vertices to sample. Defaults to 1000.
+        radius (int): Radius of the ego-networks. Defaults to 1.
+        max_neighbours (int): If given, the neighbours of any vertex in an
+            ego-network are randomly cut down to this many, which bounds the
+            cost of hub vertices. Defaults to None.
+        confidence (float): Level of the confidence intervals. Defaults to
+            0.95.
+        bootstrap (int): Number of bootstrap resamples. Defaults to 200.
+        seed (int): Seed for the random sampling. Defaults to None.
+
+    Returns:
+        results (dict): Dictionary with the structure:
+            {'membership_distribution': {'membership': [...],
+                                         'count': [...],
+                                         'lower': [...],
+                                         'upper': [...]},
+             'size_distribution': {'size': [...],
+                                   'count': [...],
+                                   'lower': [...],
+                                   'upper': [...]},
+             'samples': number_of_sampled_vertices,
+             'vertices': number_of_vertices,
+            }
+            where count is the estimate and lower and upper are the bounds
+            of its confidence interval.
+    """
+    if isinstance(edges, str):
+        edges = read_edge_file(edges)
+    adjacency = build_adjacency(edges)
+    rng = random.Random(seed)
+
+    vertices = list(adjacency)
+    n_vertices = len(vertices)
+    sampled = rng.sample(vertices, min(samples, n_vertices))
+    if max_neighbours is None:
+        local = adjacency
+    else:
+        local = _Subsampled(adjacency, max_neighbours, rng)
+
+    memberships = []
+    sizes = []
+    for v in sampled:
+        membership, comm_sizes = _sample_vertex(v, local, k, radius)
+        memberships.append({membership: 1.0})
+        size_weights = defaultdict(float)
+        for size in comm_sizes:
+            size_weights[size] += 1.0 / size
+        sizes.append(size_weights)
+
+    return {
+            'membership_distribution': _estimate(
+                memberships, 'membership', n_vertices, confidence,
+                bootstrap, rng),
+            'size_distribution': _estimate(
+                sizes, 'size', n_vertices, confidence, bootstrap, rng),
+            'samples': len(sampled),
+            'vertices': n_vertices,
+            }
+
+
+def read_edge_file(file_path):
+    """read_edge_file
+    Reads an edge list in CFinder's input format, one 'source target' or
+    'source target weight' per line. Blank lines and lines starting with
+    '#' are skipped.
+
+    Args:
+        file_path (str): Path of the edge list file.
+
+    Returns:
+        edges (list): Edges as (source, target) tuples.
+    """
+    edges = []
+    with open(file_path, 'r') as f:
+        for line in f:
+            row = line.split()
+            if len(row) < 2 or row[0].startswith('#'):
+                continue
+            edges.append((row[0], row[1]))
+    return edges
+
+
+def _sample_vertex(v, local, k, radius):
+    """_sample_vertex
+    Percolates the ego-network of a vertex and returns the number of
+    communities containing it and their sizes.
+    """
+    ego = {v}
+    frontier = {v}
+    for _ in range(radius):
+        frontier = {u for w in frontier for u in local[w]} - ego
+        ego |= frontier
+
+    neighbourhood = {u: {w for w in local[u] & ego if u in local[w]}
+                     for u in ego}
+    cliques = {}
+    vertex_cliques = defaultdict(set)
+    for clique in maximal_cliques(neighbourhood):
+        if len(clique) >= k:
+            c = len(cliques)
+            cliques[c] = clique
+            for u in clique:
+                vertex_cliques[u].add(c)
+
+    sizes = []
+    for component in percolate(cliques, cliques, vertex_cliques, k):
+        if component & vertex_cliques.get(v, set()):
+            community = set()
+            for c in component:
+                community.update(cliques[c])
+            sizes.append(len(community))
+    return len(sizes), sizes
+
+
+def _estimate(contributions, metric, n_vertices, confidence, bootstrap, rng):
+    """_estimate
+    Scales per-sample contributions up to population counts and bootstraps
+    their confidence intervals.
+    """
+    n = len(contributions)
+    scale = n_vertices / n if n else 0.0
+
+    def totals(indices):
+        t = defaultdict(float)
+        for i in indices:
+            for value, weight in contributions[i].items():
+                t[value] += weight * scale
+        return t
+
+    estimate = totals(range(n))
+    values = sorted(estimate)
+    resamples = defaultdict(list)
+    for _ in range(bootstrap if n else 0):
+        t = totals([rng.randrange(n) for _ in range(n)])
+        for value in values:
+            resamples[value].append(t.get(value, 0.0))
+
+    alpha = (1 - confidence) / 2
+    data_dict = {metric: [], 'count': [], 'lower': [], 'upper': []}
+    for value in values:
+        data_dict[metric].append(value)
+        data_dict['count'].append(estimate[value])
+        r = sorted(resamples[value]) or [estimate[value]]
+        data_dict['lower'].append(r[int(alpha * (len(r) - 1))])
+        data_dict['upper'].append(r[int(round((1 - alpha) * (len(r) - 1)))])
+    return data_dict
+
+
+class _Subsampled():
+
+    def __init__(self, adjacency, max_neighbours, rng):
+        """_Subsampled
+        A view of an adjacency dict in which each vertex keeps at most
+        max_neighbours randomly chosen neighbours. Choices are cached so a
+        vertex's neighbours are the same each time they are looked up.
+        """
+        self.adjacency = adjacency
+        self.max_neighbours = max_neighbours
+        self.rng = rng
+        self.cache = {}
+
+    def __getitem__(self, v):
+        if v not in self.cache:
+            neighbours = self.adjacency[v]
+            if len(neighbours) > self.max_neighbours:
+                neighbours = set(self.rng.sample(
+                    sorted(neighbours, key=str), self.max_neighbours))
+            self.cache[v] = neighbours
+        return self.cache[v]
@@ -4,8 +4,15 @@ import os
 import shutil
 
 from collections import defaultdict
+from subprocess import CalledProcessError
+from subprocess import Popen
+from subprocess import TimeoutExpired
 from subprocess import run
 
+from py_cfinder.checkpoint import MANIFEST_NAME
+from py_cfinder.checkpoint import RunManifest
+from py_cfinder.checkpoint import hash_file
+
 
 class CFinder():
 
@@ -70,7 +77,8 @@ class CFinder():
                     )
 
     def find(self, i, o=None, W=None, w=None, d=None, t=None, D=False,
-        I=False, k=None, delete_output=False):
+        I=False, k=None, delete_output=False, resume=False,
+        on_k_complete=None, poll_interval=5):
         """find
         Run the CFinder tool on an edge list.
         Args
@@ -90,6 +98,20 @@ class CFinder():
             k (int): The k-clique size.
             delete_output (bool): Delete output files when finished. Defaults
                 to False.
+            resume (bool): Run in resumable mode. A manifest of the input
+                and options is kept in the output directory, along with
+                which k subdirectories are fully written. If a matching
+                run was interrupted after its cliques were written, CFinder
+                is run once more and only the missing k subdirectories are
+                taken from it; if it had finished, its output is reused
+                without running CFinder. Otherwise output left by an
+                earlier run is removed first. Defaults to False.
+            on_k_complete (callable): In resumable mode, called as
+                on_k_complete(k, results) as each k subdirectory is fully
+                written, while the run continues. results has the format of
+                `load`'s results[k]. Defaults to None.
+            poll_interval (float): In resumable mode, seconds between checks
+                for newly written k subdirectories. Defaults to 5.
         """
         
 
@@ -133,7 +155,17 @@ class CFinder():
             else:
                 command.append('-I')
 
-        run(command)
+        if resume:
+            options = {'W': W, 'w': w, 'd': d, 't': t, 'D': D, 'I': I, 'k': k}
+            self._run_resumable(command, i, options, clique_dir, D,
+                                on_k_complete, poll_interval)
+        else:
+            # The output will no longer match any manifest of an earlier
+            # resumable run.
+            manifest_path = os.path.join(self.output_dir, MANIFEST_NAME)
+            if os.path.isfile(manifest_path):
+                os.remove(manifest_path)
+            run(command)
 
         cliques = self._load_community_file(
                 os.path.join(self.output_dir, clique_dir)
@@ -172,10 +204,7 @@ class CFinder():
         if output_dir is None:
             output_dir = self.output_dir
 
-        if directed:
-            dirs = {k: v.format('directed_') for k, v in self.dirs.items()}
-        else:
-            dirs = {k: v.format('') for k, v in self.dirs.items()}
+        dirs = self._format_dirs(directed)
 
         results = {}
 
@@ -190,36 +219,192 @@ class CFinder():
 
         for k_dir in k_dirs:
             k = int(k_dir.split('=')[-1])
-            results[k] = {}
-            k_output_dir = os.path.join(output_dir, k_dir)
-            results[k]['communities'] = self._load_community_file(
-                    os.path.join(k_output_dir, dirs['comms'])
-                    )
-            results[k]['communities_cliques'] = self._load_community_file(
-                    os.path.join(k_output_dir, dirs['comms_cliques'])
-                    )
-            results[k]['communities_links'] = self._load_communities_cliques_file(
-                    os.path.join(k_output_dir, dirs['comms_links'])
-                    )
-            results[k]['communities_graph'] = self._load_graph_file(
-                    os.path.join(k_output_dir, dirs['comms_graph'])
-                    )
-            results[k]['degree_distribution'] = self._load_distribution_file(
-                    os.path.join(k_output_dir, dirs['degree_dist'])
-                    )
-            results[k]['membership_distribution'] = self._load_distribution_file(
-                    os.path.join(k_output_dir, dirs['membership_dist'])
-                    )
-            results[k]['overlap_distribution'] = self._load_distribution_file(
-                    os.path.join(k_output_dir, dirs['overlap_dist'])
-                    )
-            results[k]['size_distribution'] = self._load_distribution_file(
-                    os.path.join(k_output_dir, dirs['size_dist'])
+            results[k] = self._load_k_directory(
+                    os.path.join(output_dir, k_dir), dirs
                     )
 
         return results
 
-    
+    def _load_k_directory(self, k_output_dir, dirs):
+        """_load_k_directory
+        Loads the results in a 'k=...' subdirectory of a CFinder output
+        directory.
+
+        Args:
+            k_output_dir (str): Path of the k subdirectory.
+            dirs (dict): File names, as returned by `_format_dirs`.
+
+        Returns:
+            results (dict): Dictionary containing the outputs for one k, in
+                the format of `load`'s results[k].
+        """
+        results = {}
+        results['communities'] = self._load_community_file(
+                os.path.join(k_output_dir, dirs['comms'])
+                )
+        results['communities_cliques'] = self._load_community_file(
+                os.path.join(k_output_dir, dirs['comms_cliques'])
+                )
+        results['communities_links'] = self._load_communities_cliques_file(
+                os.path.join(k_output_dir, dirs['comms_links'])
+                )
+        results['communities_graph'] = self._load_graph_file(
+                os.path.join(k_output_dir, dirs['comms_graph'])
+                )
+        results['degree_distribution'] = self._load_distribution_file(
+                os.path.join(k_output_dir, dirs['degree_dist'])
+                )
+        results['membership_distribution'] = self._load_distribution_file(
+                os.path.join(k_output_dir, dirs['membership_dist'])
+                )
+        results['overlap_distribution'] = self._load_distribution_file(
+                os.path.join(k_output_dir, dirs['overlap_dist'])
+                )
+        results['size_distribution'] = self._load_distribution_file(
+                os.path.join(k_output_dir, dirs['size_dist'])
+                )
+
+        return results
+
+    def _format_dirs(self, directed):
+        """_format_dirs
+        Returns the output file names for directed or undirected mode.
+        """
+        if directed:
+            return {k: v.format('directed_') for k, v in self.dirs.items()}
+        else:
+            return {k: v.format('') for k, v in self.dirs.items()}
+
+    def _run_resumable(self, command, i, options, clique_dir, directed,
+                       on_k_complete, poll_interval):
+        """_run_resumable
+        Runs CFinder in resumable mode. See `find`.
+        """
+        manifest = RunManifest(self.output_dir, hash_file(i), options)
+        previous = RunManifest.read(self.output_dir)
+        if manifest.matches(previous) and previous.cliques_complete:
+            manifest = previous
+            for k in sorted(manifest.finished_k):
+                self._k_complete(k, directed, on_k_complete)
+            if not manifest.complete:
+                self._run_missing_k(command, manifest, directed,
+                                    on_k_complete, poll_interval)
+            return
+
+        self._clear_output(clique_dir)
+        manifest.write()
+        self._watch(command, self.output_dir, manifest, directed,
+                    on_k_complete, poll_interval)
+        manifest.cliques_complete = True
+        manifest.complete = True
+        manifest.write()
+
+    def _run_missing_k(self, command, manifest, directed, on_k_complete,
+                       poll_interval):
+        """_run_missing_k
+        Completes an interrupted run. CFinder is run once more in to a
+        '.resume' subdirectory, as it cannot skip the k values that are
+        already written, and each k subdirectory that is missing from the
+        output directory is moved across as soon as it is fully written.
+        """
+        resume_dir = os.path.join(self.output_dir, '.resume')
+        if os.path.isdir(resume_dir):
+            shutil.rmtree(resume_dir)
+        resume_command = self._with_option(command, '-o', resume_dir)
+        self._watch(resume_command, resume_dir, manifest, directed,
+                    on_k_complete, poll_interval)
+
+        shutil.rmtree(resume_dir, ignore_errors=True)
+        manifest.complete = True
+        manifest.write()
+
+    def _watch(self, command, run_dir, manifest, directed, on_k_complete,
+               poll_interval):
+        """_watch
+        Runs a CFinder command that writes to run_dir and, while it runs,
+        marks each k subdirectory that is fully written and not yet in the
+        manifest as finished, moving it in to the output directory first if
+        run_dir is elsewhere. CFinder is killed if anything goes wrong while
+        it is being watched.
+        """
+        process = Popen(command)
+        try:
+            while True:
+                try:
+                    returncode = process.wait(timeout=poll_interval)
+                except TimeoutExpired:
+                    returncode = None
+
+                k_values = []
+                if os.path.isdir(run_dir):
+                    k_values = sorted(int(k_dir.split('=')[-1]) for k_dir in
+                                      self._get_k_directories(run_dir))
+                # CFinder writes each k in turn, so the highest k may still
+                # be being written unless the run has finished cleanly.
+                if returncode != 0:
+                    k_values = k_values[:-1]
+                for k in k_values:
+                    if k in manifest.finished_k:
+                        continue
+                    if run_dir != self.output_dir:
+                        k_dir = 'k={}'.format(k)
+                        target = os.path.join(self.output_dir, k_dir)
+                        if os.path.isdir(target):
+                            shutil.rmtree(target)
+                        shutil.move(os.path.join(run_dir, k_dir), target)
+                    manifest.finish_k(k)
+                    self._k_complete(k, directed, on_k_complete)
+
+                if returncode is not None:
+                    break
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+
+        if returncode != 0:
+            raise CalledProcessError(returncode, command)
+
+    def _clear_output(self, clique_dir):
+        """_clear_output
+        Removes the cliques file, k subdirectories and manifest left in the
+        output directory by an earlier run, so that they are not mistaken
+        for output of the new run.
+        """
+        if not os.path.isdir(self.output_dir):
+            return
+        for name in self._get_k_directories(self.output_dir) + ['.resume']:
+            shutil.rmtree(os.path.join(self.output_dir, name),
+                          ignore_errors=True)
+        for name in (clique_dir, MANIFEST_NAME):
+            path = os.path.join(self.output_dir, name)
+            if os.path.isfile(path):
+                os.remove(path)
+
+    def _k_complete(self, k, directed, on_k_complete):
+        """_k_complete
+        Parses a fully written k subdirectory and passes it to the
+        on_k_complete callback, if there is one.
+        """
+        if on_k_complete is not None:
+            k_output_dir = os.path.join(self.output_dir, 'k={}'.format(k))
+            on_k_complete(
+                    k,
+                    self._load_k_directory(
+                        k_output_dir, self._format_dirs(directed))
+                    )
+
+    def _with_option(self, command, flag, value):
+        """_with_option
+        Returns a copy of a CFinder command with an option set.
+        """
+        command = list(command)
+        if flag in command:
+            command[command.index(flag) + 1] = value
+        else:
+            command.extend([flag, value])
+        return command
+
     def _load_community_file(self, file_path):
         """_load_community_file
         Loads a CFinder communities or cliques output file.
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+
+MANIFEST_NAME = '.py_cfinder_manifest.json'
+
+
+def hash_file(file_path):
+    """hash_file
+    Returns the SHA-256 hex digest of a file's contents.
+
+    Args:
+        file_path (str): Path of the file.
+
+    Returns:
+        (str): Hex digest.
+    """
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class RunManifest():
+
+    def __init__(self, output_dir, input_hash, options):
+        """RunManifest
+        Records what a CFinder run was asked to do and how far it got, so
+        that an interrupted run can be picked up again. The manifest is
+        kept as JSON in the run's output directory.
+
+        Args:
+            output_dir (str): CFinder output directory.
+            input_hash (str): SHA-256 hex digest of the input file.
+            options (dict): Options of the run that affect its output.
+        """
+        self.output_dir = output_dir
+        self.input_hash = input_hash
+        self.options = options
+        self.cliques_complete = False
+        self.finished_k = []
+        self.complete = False
+
+    @property
+    def path(self):
+        return os.path.join(self.output_dir, MANIFEST_NAME)
+
+    @classmethod
+    def read(cls, output_dir):
+        """read
+        Reads the manifest of an output directory.
+
+        Args:
+            output_dir (str): CFinder output directory.
+
+        Returns:
+            (RunManifest): The manifest, or None if there is none.
+        """
+        path = os.path.join(output_dir, MANIFEST_NAME)
+        if not os.path.isfile(path):
+            return None
+        with open(path, 'r') as f:
+            state = json.load(f)
+        manifest = cls(output_dir, state['input_hash'], state['options'])
+        manifest.cliques_complete = state['cliques_complete']
+        manifest.finished_k = state['finished_k']
+        manifest.complete = state['complete']
+        return manifest
+
+    def write(self):
+        """write
+        Writes the manifest, replacing any previous one atomically.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        state = {
+                'input_hash': self.input_hash,
+                'options': self.options,
+                'cliques_complete': self.cliques_complete,
+                'finished_k': sorted(self.finished_k),
+                'complete': self.complete,
+                }
+        tmp_path = '{}.tmp'.format(self.path)
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+    def matches(self, other):
+        """matches
+        Checks whether another manifest describes the same run.
+        """
+        return (other is not None
+                and self.input_hash == other.input_hash
+                and self.options == other.options)
+
+    def finish_k(self, k):
+        """finish_k
+        Marks a k directory as fully written and saves the manifest.
+        """
+        if k not in self.finished_k:
+            self.finished_k.append(k)
+        self.cliques_complete = True
+        self.write()
@@ -0,0 +1,551 @@
+import json
+import os
+
+from collections import defaultdict
+
+from py_cfinder.percolation import adjacent_cliques
+from py_cfinder.percolation import build_adjacency
+from py_cfinder.percolation import maximal_cliques
+from py_cfinder.percolation import percolate
+from py_cfinder.percolation import sorted_tuple
+
+MIN_CLIQUE_SIZE = 3
+
+
+class IncrementalCFinder():
+
+    def __init__(self, edges, cliques=None, communities=None, k=3):
+        """IncrementalCFinder
+        Maintains maximal cliques and k-clique communities of an undirected,
+        unweighted graph under edge insertions and deletions. Each update only
+        revisits the cliques around the changed edges and the communities
+        that contain them, so the cost follows the size of the change rather
+        than the size of the graph.
+
+        Clique and community IDs are kept stable between updates, so they can
+        be used to track cliques and communities from one batch to the next.
+        New cliques and communities are given fresh IDs.
+
+        Args:
+            edges (iterable): Edges as (source, target) or
+                (source, target, weight) tuples. Weights are ignored.
+            cliques (dict): Cliques in the format returned by
+                `CFinder.find`, i.e. {'clique': [...], 'vertices': [...]}.
+                If None, the maximal cliques are found from the edges.
+                Defaults to None.
+            communities (dict): Communities for each k in the format of
+                `CFinder.load`'s 'communities_cliques' results, i.e.
+                {k: {'community': [...], 'cliques': [...]}}. Communities
+                for any k without an entry are found by percolating the
+                cliques. Defaults to None.
+            k (int or list): The k-clique size, or sizes, to maintain
+                communities for. Must be at least 3. Defaults to 3.
+        """
+        if isinstance(k, int):
+            k = [k]
+        self.k = sorted(set(k))
+        if self.k[0] < MIN_CLIQUE_SIZE:
+            raise ValueError(
+                    "k must be at least {}".format(MIN_CLIQUE_SIZE)
+                    )
+
+        self.adjacency = build_adjacency(edges)
+        self.cliques = {}
+        self.vertex_cliques = defaultdict(set)
+        self._clique_ids = {}
+        self._next_clique = 0
+
+        if cliques is None:
+            for clique in maximal_cliques(self.adjacency):
+                if len(clique) >= MIN_CLIQUE_SIZE:
+                    self._add_clique(clique)
+        else:
+            for c, vertices in zip(cliques['clique'], cliques['vertices']):
+                self._add_clique(frozenset(vertices), c)
+
+        self.communities = {}
+        self._clique_community = {}
+        self._next_community = {}
+        if communities is None:
+            communities = {}
+        for k in self.k:
+            self.communities[k] = {}
+            self._clique_community[k] = {}
+            self._next_community[k] = 0
+            if k in communities:
+                comms = communities[k]
+                for comm, comm_cliques in zip(
+                        comms['community'], comms['cliques']):
+                    self._set_community(k, comm, set(comm_cliques))
+            else:
+                for component in percolate(
+                        self.cliques, self.cliques, self.vertex_cliques, k):
+                    self._set_community(k, None, component)
+
+    @classmethod
+    def from_results(cls, results, edges=None, k=None):
+        """from_results
+        Seeds an incremental engine from the results of `CFinder.load`, or
+        from the cliques returned by `CFinder.find`.
+
+        Args:
+            results (dict): Results from `CFinder.load`, or the cliques
+                dict returned by `CFinder.find`.
+            edges (iterable): Edges of the graph that was searched. If None,
+                the 'graph' entry of results is used. Defaults to None.
+            k (int or list): The k-clique size, or sizes, to maintain. If
+                None, the k values present in results are used. Defaults to
+                None.
+
+        Returns:
+            (IncrementalCFinder): The seeded engine.
+        """
+        if 'clique' in results:
+            results = {'cliques': results}
+
+        if edges is None:
+            graph = results.get('graph')
+            if graph is None:
+                raise ValueError(
+                        ("No edges were given and the results do not "
+                         "contain a graph")
+                        )
+            edges = zip(graph['source'], graph['target'])
+
+        result_ks = [key for key in results if isinstance(key, int)]
+        if k is None:
+            if len(result_ks) == 0:
+                raise ValueError("No k was given and the results contain none")
+            k = result_ks
+
+        communities = {key: results[key]['communities_cliques']
+                       for key in result_ks
+                       if 'communities_cliques' in results[key]}
+
+        return cls(edges, cliques=results['cliques'],
+                   communities=communities, k=k)
+
+    def insert_edges(self, edges):
+        """insert_edges
+        Adds edges to the graph and updates the cliques and communities.
+
+        Args:
+            edges (iterable): Edges as (source, target) tuples.
+        """
+        self.update(inserted=edges)
+
+    def delete_edges(self, edges):
+        """delete_edges
+        Removes edges from the graph and updates the cliques and communities.
+
+        Args:
+            edges (iterable): Edges as (source, target) tuples.
+        """
+        self.update(deleted=edges)
+
+    def update(self, inserted=(), deleted=()):
+        """update
+        Applies a batch of edge deletions and insertions, in that order, and
+        then updates the communities around the cliques that changed.
+        Insertions can only merge communities, as each new clique covers
+        the cliques it replaces, so they are handled by merging the touched
+        communities. A community that lost a clique to a deletion is
+        checked for a split by searching outwards from the cliques around
+        the lost one, which stops as soon as the searches meet.
+
+        Args:
+            inserted (iterable): Edges to add as (source, target) tuples.
+            deleted (iterable): Edges to remove as (source, target) tuples.
+        """
+        added = {}
+        affected = {k: {} for k in self.k}
+
+        for edge in deleted:
+            self._delete_edge(edge[0], edge[1], added, affected)
+        for edge in inserted:
+            self._insert_edge(edge[0], edge[1], added, affected)
+
+        for k in self.k:
+            self._update_communities(k, added, affected[k])
+
+    def results(self):
+        """results
+        Returns the current state in the format of `CFinder.load`.
+
+        Returns:
+            results (dict): Dictionary with the structure:
+                {'cliques': cliques,
+                 'graph': graph,
+                 k: {
+                    'communities': communities,
+                    'communities_cliques': communities_cliques,
+                    },
+                }
+        """
+        results = {}
+
+        clique_ids = sorted(self.cliques)
+        results['cliques'] = {
+                'clique': clique_ids,
+                'vertices': [sorted_tuple(self.cliques[c]) for c in clique_ids],
+                }
+
+        graph = {'source': [], 'target': [], 'weight': []}
+        seen = set()
+        for s, neighbours in self.adjacency.items():
+            seen.add(s)
+            for t in neighbours:
+                if t not in seen:
+                    graph['source'].append(s)
+                    graph['target'].append(t)
+                    graph['weight'].append(1)
+        results['graph'] = graph
+
+        for k in self.k:
+            comm_ids = sorted(self.communities[k])
+            communities = {'community': comm_ids, 'vertices': []}
+            communities_cliques = {'community': comm_ids, 'cliques': []}
+            for comm in comm_ids:
+                comm_cliques = self.communities[k][comm]
+                vertices = set()
+                for c in comm_cliques:
+                    vertices.update(self.cliques[c])
+                communities['vertices'].append(sorted_tuple(vertices))
+                communities_cliques['cliques'].append(
+                        tuple(sorted(comm_cliques)))
+            results[k] = {
+                    'communities': communities,
+                    'communities_cliques': communities_cliques,
+                    }
+
+        return results
+
+    def save(self, file_path):
+        """save
+        Persists the engine state as JSON so that the next batch of updates
+        can continue from it. The file is replaced atomically.
+
+        Args:
+            file_path (str): Path of the state file.
+        """
+        state = {
+                'k': self.k,
+                'edges': self.results()['graph'],
+                'cliques': [[c, list(v)] for c, v in self.cliques.items()],
+                'next_clique': self._next_clique,
+                'communities': {
+                    str(k): [[comm, sorted(comm_cliques)]
+                             for comm, comm_cliques in comms.items()]
+                    for k, comms in self.communities.items()
+                    },
+                'next_community': {
+                    str(k): n for k, n in self._next_community.items()
+                    },
+                }
+
+        tmp_path = '{}.tmp'.format(file_path)
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, file_path)
+
+    @classmethod
+    def restore(cls, file_path):
+        """restore
+        Loads an engine from a state file written by `save`.
+
+        Args:
+            file_path (str): Path of the state file.
+
+        Returns:
+            (IncrementalCFinder): The restored engine.
+        """
+        with open(file_path, 'r') as f:
+            state = json.load(f)
+
+        cliques = {'clique': [], 'vertices': []}
+        for c, vertices in state['cliques']:
+            cliques['clique'].append(c)
+            cliques['vertices'].append(vertices)
+
+        communities = {}
+        for k, comms in state['communities'].items():
+            communities[int(k)] = {
+                    'community': [comm for comm, _ in comms],
+                    'cliques': [comm_cliques for _, comm_cliques in comms],
+                    }
+
+        edges = state['edges']
+        engine = cls(zip(edges['source'], edges['target']), cliques=cliques,
+                     communities=communities, k=state['k'])
+        engine._next_clique = max(engine._next_clique, state['next_clique'])
+        for k, n in state['next_community'].items():
+            engine._next_community[int(k)] = max(
+                    engine._next_community[int(k)], n)
+        return engine
+
+    def _insert_edge(self, u, v, added, affected):
+        """_insert_edge
+        Adds an edge. The new maximal cliques are {u, v} joined with each
+        maximal clique of the common neighbourhood of u and v, and any old
+        clique containing u or v that they cover is removed.
+        """
+        if u == v or v in self.adjacency.get(u, ()):
+            return
+        self.adjacency[u].add(v)
+        self.adjacency[v].add(u)
+
+        common = self.adjacency[u] & self.adjacency[v]
+        if not common:
+            return
+        new_cliques = [clique | {u, v}
+                       for clique in maximal_cliques(self.adjacency, common)]
+
+        candidates = self.vertex_cliques[u] | self.vertex_cliques[v]
+        new_ids = []
+        for clique in new_cliques:
+            c = self._add_clique(clique)
+            added[c] = {}
+            new_ids.append(c)
+
+        for c in candidates:
+            clique = self.cliques[c]
+            covering = [n for n in new_ids if clique <= self.cliques[n]]
+            if covering:
+                self._remove_clique(c, added, affected, covering)
+
+    def _delete_edge(self, u, v, added, affected):
+        """_delete_edge
+        Removes an edge. Each clique containing both u and v is removed and
+        replaced by whichever of its two halves, without u or without v, are
+        still maximal.
+        """
+        if v not in self.adjacency.get(u, ()):
+            return
+        self.adjacency[u].discard(v)
+        self.adjacency[v].discard(u)
+
+        broken = self.vertex_cliques[u] & self.vertex_cliques[v]
+        halves = set()
+        for c in broken:
+            clique = self.cliques[c]
+            halves.add(clique - {u})
+            halves.add(clique - {v})
+            self._remove_clique(c, added, affected)
+
+        for vertex in (u, v):
+            if not self.adjacency[vertex]:
+                del self.adjacency[vertex]
+
+        for half in halves:
+            if (len(half) >= MIN_CLIQUE_SIZE and half not in self._clique_ids
+                    and self._is_maximal(half)):
+                added[self._add_clique(half)] = {}
+
+    def _is_maximal(self, clique):
+        """_is_maximal
+        Checks that no vertex outside a clique is adjacent to all of it.
+        """
+        vertices = iter(clique)
+        common = set(self.adjacency.get(next(vertices), ()))
+        for vertex in vertices:
+            common &= self.adjacency.get(vertex, set())
+            if not common:
+                return True
+        return not common
+
+    def _add_clique(self, clique, clique_id=None):
+        """_add_clique
+        Registers a clique and returns its ID.
+        """
+        if clique_id is None:
+            clique_id = self._next_clique
+        self._next_clique = max(self._next_clique, clique_id + 1)
+        self.cliques[clique_id] = clique
+        self._clique_ids[clique] = clique_id
+        for vertex in clique:
+            self.vertex_cliques[vertex].add(clique_id)
+        return clique_id
+
+    def _remove_clique(self, clique_id, added, affected, covering=None):
+        """_remove_clique
+        Unregisters a clique. If it was removed by a deletion, the
+        communities that held it are marked as affected, along with the
+        cliques it was adjacent to, from which they are checked for a split.
+        If it was covered by new cliques, those new cliques inherit its
+        communities, along with any communities it had inherited itself,
+        and its adjacent cliques are added to those of any affected
+        community, as it no longer links them there.
+        """
+        inherited = added.pop(clique_id, {})
+        for k in self.k:
+            comms = set(inherited.get(k, ()))
+            comm = self._clique_community[k].pop(clique_id, None)
+            if comm is not None:
+                self.communities[k][comm].discard(clique_id)
+                comms.add(comm)
+            if covering is None:
+                marked = comms
+            else:
+                for n in covering:
+                    added[n].setdefault(k, set()).update(comms)
+                marked = comms & affected[k].keys()
+            if marked:
+                seeds = adjacent_cliques(clique_id, self.cliques,
+                                         self.vertex_cliques, k)
+                for comm in marked:
+                    affected[k].setdefault(comm, set()).update(seeds)
+
+        clique = self.cliques.pop(clique_id)
+        del self._clique_ids[clique]
+        for vertex in clique:
+            vertex_cliques = self.vertex_cliques[vertex]
+            vertex_cliques.discard(clique_id)
+            if not vertex_cliques:
+                del self.vertex_cliques[vertex]
+
+    def _set_community(self, k, comm, comm_cliques):
+        """_set_community
+        Registers a community for k, giving it a fresh ID if comm is None.
+        """
+        if comm is None:
+            comm = self._next_community[k]
+        self._next_community[k] = max(self._next_community[k], comm + 1)
+        self.communities[k][comm] = comm_cliques
+        for c in comm_cliques:
+            self._clique_community[k][c] = comm
+        return comm
+
+    def _update_communities(self, k, added, affected):
+        """_update_communities
+        Updates the communities for k after a batch of changes. Communities
+        that lost cliques to deletions are split where they came apart, then
+        the new cliques are merged in to the communities they touch, which
+        may join split parts back together. Communities left with no
+        cliques are dropped.
+        """
+        for comm, seeds in affected.items():
+            self._split(k, comm, seeds)
+        new_cliques = {c for c in added if len(self.cliques[c]) >= k}
+        # The part of a split community that kept its ID need not be the
+        # part a covered clique was in. A new clique covering it is
+        # adjacent to whatever it was adjacent to, so it rejoins the right
+        # part without inheriting the ID.
+        split = {comm for comm in affected if self.communities[k][comm]}
+        for c in new_cliques:
+            added[c].get(k, set()).difference_update(split)
+        if new_cliques:
+            self._merge(k, new_cliques, added)
+        for comm in affected:
+            if not self.communities[k].get(comm, True):
+                del self.communities[k][comm]
+
+    def _merge(self, k, new_cliques, added):
+        """_merge
+        Groups the new cliques with each other and with the communities they
+        are adjacent to or inherited, and merges each group in to its
+        largest community. Smaller communities are moved in to larger ones,
+        so the cost follows the size of the change.
+        """
+        parent = {}
+
+        def find(node):
+            while parent.setdefault(node, node) != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        def union(a, b):
+            parent[find(a)] = find(b)
+
+        for c in new_cliques:
+            find(('clique', c))
+            for other in adjacent_cliques(c, self.cliques,
+                                          self.vertex_cliques, k):
+                if other in new_cliques:
+                    union(('clique', c), ('clique', other))
+                else:
+                    comm = self._clique_community[k].get(other)
+                    if comm is not None:
+                        union(('clique', c), ('community', comm))
+            for comm in added[c].get(k, ()):
+                union(('clique', c), ('community', comm))
+
+        groups = {}
+        for node in list(parent):
+            comms, cliques = groups.setdefault(find(node), (set(), set()))
+            kind, value = node
+            if kind == 'clique':
+                cliques.add(value)
+            else:
+                comms.add(value)
+
+        for comms, cliques in groups.values():
+            if not cliques:
+                continue
+            if not comms:
+                self._set_community(k, None, cliques)
+                continue
+            target = max(comms, key=lambda comm: (
+                len(self.communities[k][comm]), -comm))
+            target_cliques = self.communities[k][target]
+            for comm in comms - {target}:
+                cliques |= self.communities[k].pop(comm)
+            target_cliques |= cliques
+            for c in cliques:
+                self._clique_community[k][c] = target
+
+    def _split(self, k, comm, seeds):
+        """_split
+        Splits a community that lost cliques in to its remaining parts.
+        Every part that came away holds a seed, i.e. a clique that was
+        adjacent to a lost one, so a search is started from each seed and
+        the searches are run in lockstep. Searches that meet are joined, and
+        a search that runs out of cliques has found a whole part, which is
+        given a fresh ID. The search left at the end keeps the old ID
+        without being finished, so the cost follows the size of the parts
+        that came away rather than the size of the community.
+        """
+        members = self.communities[k][comm]
+        seeds = sorted(seeds & members)
+        owner = {c: i for i, c in enumerate(seeds)}
+        searches = {i: ({c}, [c]) for i, c in enumerate(seeds)}
+
+        while len(searches) > 1:
+            for i in list(searches):
+                if i not in searches:
+                    continue
+                if len(searches) == 1:
+                    break
+                visited, stack = searches[i]
+                if not stack:
+                    del searches[i]
+                    members -= visited
+                    self._set_community(k, None, visited)
+                    continue
+                c = stack.pop()
+                for other in adjacent_cliques(c, self.cliques,
+                                              self.vertex_cliques, k):
+                    if other not in members:
+                        continue
+                    j = owner.get(other)
+                    if j is None:
+                        owner[other] = i
+                        visited.add(other)
+                        stack.append(other)
+                    elif j != i:
+                        i = self._join_searches(searches, owner, i, j)
+                        visited, stack = searches[i]
+
+    def _join_searches(self, searches, owner, i, j):
+        """_join_searches
+        Joins two searches of `_split` that have met, moving the smaller in
+        to the larger, and returns the index of the joined search.
+        """
+        if len(searches[i][0]) < len(searches[j][0]):
+            i, j = j, i
+        visited, stack = searches.pop(j)
+        for c in visited:
+            owner[c] = i
+        searches[i][0].update(visited)
+        searches[i][1].extend(stack)
+        return i
@@ -0,0 +1,145 @@
+from collections import defaultdict
+
+
+def compare(results_a, results_b, k=None, min_jaccard=0.3):
+    """compare
+    Matches communities between two sets of results and labels how they
+    changed. Candidate pairs are found through an inverted index of vertex
+    to communities, so only communities that share at least one vertex are
+    ever compared and the cost follows the total overlap rather than the
+    product of the number of communities.
+
+    Either full results from `CFinder.load` can be given, in which case each
+    k present in both is compared, or two communities dicts, such as
+    results[3]['communities'] and results[4]['communities'] to compare
+    adjacent k values of a single run.
+
+    Events are derived from best matches. A community in results_a and one
+    in results_b are linked when one is the other's best match and their
+    Jaccard score is at least min_jaccard. Then:
+
+    * 'death': a community in results_a with no links.
+    * 'birth': a community in results_b with no links.
+    * 'merge': a community in results_b linked to several in results_a.
+    * 'split': a community in results_a linked to several in results_b.
+    * 'continue': a pair linked only to each other.
+
+    Args:
+        results_a (dict): Earlier results from `CFinder.load`, or a
+            communities dict with 'community' and 'vertices' keys.
+        results_b (dict): Later results, in the same form as results_a.
+        k (int or list): The k values to compare when full results are
+            given. If None, all k values present in both are used. Defaults
+            to None.
+        min_jaccard (float): Minimum Jaccard score for two communities to
+            be linked. Defaults to 0.3.
+
+    Returns:
+        comparison (dict): For communities dicts, a dict with the structure:
+            {'matches': {'community_a': [...],
+                         'community_b': [...],
+                         'jaccard': [...]},
+             'events': {'event': [...],
+                        'communities_a': [...],
+                        'communities_b': [...]},
+            }
+            where matches holds the best match in results_b for every
+            community in results_a (None when nothing overlaps). For full
+            results, a dict of these keyed by k.
+    """
+    if 'vertices' in results_a:
+        return _compare_communities(results_a, results_b, min_jaccard)
+
+    if k is None:
+        k = sorted(key for key in results_a
+                   if isinstance(key, int) and key in results_b)
+    elif isinstance(k, int):
+        k = [k]
+
+    return {key: _compare_communities(results_a[key]['communities'],
+                                      results_b[key]['communities'],
+                                      min_jaccard)
+            for key in k}
+
+
+def _compare_communities(communities_a, communities_b, min_jaccard):
+    """_compare_communities
+    Compares two communities dicts. See `compare`.
+    """
+    ids_a = communities_a['community']
+    ids_b = communities_b['community']
+    sets_a = [set(v) for v in communities_a['vertices']]
+    sets_b = [set(v) for v in communities_b['vertices']]
+
+    index_b = defaultdict(list)
+    for j, vertices in enumerate(sets_b):
+        for v in vertices:
+            index_b[v].append(j)
+
+    best_a = [(0.0, None)] * len(sets_a)
+    best_b = [(0.0, None)] * len(sets_b)
+    for i, vertices in enumerate(sets_a):
+        shared = defaultdict(int)
+        for v in vertices:
+            for j in index_b.get(v, ()):
+                shared[j] += 1
+        for j, n in shared.items():
+            jaccard = n / (len(vertices) + len(sets_b[j]) - n)
+            if _better(jaccard, j, best_a[i]):
+                best_a[i] = (jaccard, j)
+            if _better(jaccard, i, best_b[j]):
+                best_b[j] = (jaccard, i)
+
+    matches = {'community_a': [], 'community_b': [], 'jaccard': []}
+    for i, (jaccard, j) in enumerate(best_a):
+        matches['community_a'].append(ids_a[i])
+        matches['community_b'].append(None if j is None else ids_b[j])
+        matches['jaccard'].append(jaccard)
+
+    links_a = defaultdict(set)
+    links_b = defaultdict(set)
+    for i, (jaccard, j) in enumerate(best_a):
+        if j is not None and jaccard >= min_jaccard:
+            links_a[i].add(j)
+            links_b[j].add(i)
+    for j, (jaccard, i) in enumerate(best_b):
+        if i is not None and jaccard >= min_jaccard:
+            links_a[i].add(j)
+            links_b[j].add(i)
+
+    events = {'event': [], 'communities_a': [], 'communities_b': []}
+
+    def add_event(event, a, b):
+        events['event'].append(event)
+        events['communities_a'].append(tuple(ids_a[i] for i in sorted(a)))
+        events['communities_b'].append(tuple(ids_b[j] for j in sorted(b)))
+
+    for i in range(len(sets_a)):
+        linked = links_a.get(i)
+        if not linked:
+            add_event('death', [i], [])
+        elif len(linked) > 1:
+            add_event('split', [i], linked)
+        else:
+            j = next(iter(linked))
+            if len(links_b[j]) == 1:
+                add_event('continue', [i], [j])
+    for j in range(len(sets_b)):
+        linked = links_b.get(j)
+        if not linked:
+            add_event('birth', [], [j])
+        elif len(linked) > 1:
+            add_event('merge', linked, [j])
+
+    return {'matches': matches, 'events': events}
+
+
+def _better(jaccard, index, best):
+    """_better
+    Checks whether a candidate beats the current best match. Ties go to the
+    lower index so that results are deterministic.
+    """
+    best_jaccard, best_index = best
+    if jaccard != best_jaccard:
+        return jaccard > best_jaccard
+    return best_index is None or index < best_index
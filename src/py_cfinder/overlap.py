@@ -0,0 +1,283 @@
+import heapq
+import os
+import tempfile
+
+from array import array
+from collections import defaultdict
+from itertools import groupby
+
+
+def iter_community_file(file_path):
+    """iter_community_file
+    Streams the rows of a CFinder cliques or communities output file without
+    reading the whole file in to memory. Headers are skipped in the same way
+    as `CFinder._read_data`.
+
+    Args:
+        file_path (str): Path to a CFinder cliques or communities file.
+
+    Yields:
+        (tuple): The row ID and a tuple of its vertex names as strings.
+    """
+    with open(file_path, 'r') as f:
+        for _ in range(6):
+            next(f, None)
+        first = True
+        for line in f:
+            line = line.rstrip('\n')
+            if first:
+                first = False
+                if len(line) == 0:
+                    continue
+            if ': ' not in line:
+                continue
+            i, d = line.split(': ', 1)
+            yield int(i), tuple(d.split(' ')[:-1])
+
+
+def clique_adjacency(file_path, k, chunk_size=1000000, tmp_dir=None):
+    """clique_adjacency
+    Streams the k-clique adjacency of a CFinder cliques file, i.e. every pair
+    of cliques of size at least k that share at least k - 1 vertices.
+
+    Memory is bounded by chunk_size. Cliques are streamed from the file in to
+    (vertex, clique) records which are sorted in chunks and spilled to disk.
+    Merging the spilled runs groups the cliques of each vertex, from which
+    candidate clique pairs are counted, again in sorted chunks that are
+    spilled and merged to sum each pair's overlap. The cliques of a vertex
+    in more than chunk_size cliques are spilled too and paired a block at a
+    time. Time is still quadratic in the number of cliques per vertex, so
+    hub vertices in many cliques dominate the cost.
+
+    Args:
+        file_path (str): Path to a CFinder cliques output file.
+        k (int): The k-clique size.
+        chunk_size (int): Maximum number of records held in memory before
+            spilling to disk. Defaults to 1000000.
+        tmp_dir (str): Directory for the spilled runs. If None, the system
+            temporary directory is used. Defaults to None.
+
+    Returns:
+        (generator): Tuples of two clique IDs, lowest first, and their
+            overlap, in sorted order.
+    """
+    return _adjacency(file_path, k, chunk_size, tmp_dir, None)
+
+
+def clique_components(file_path, k, chunk_size=1000000, tmp_dir=None):
+    """clique_components
+    Finds the k-clique communities of a CFinder cliques file with bounded
+    memory, using `clique_adjacency` for the overlaps. Beyond chunk_size
+    records, only a parent array with one entry per clique is kept in
+    memory.
+
+    Args:
+        file_path (str): Path to a CFinder cliques output file.
+        k (int): The k-clique size.
+        chunk_size (int): Maximum number of records held in memory before
+            spilling to disk. Defaults to 1000000.
+        tmp_dir (str): Directory for the spilled runs. If None, the system
+            temporary directory is used. Defaults to None.
+
+    Returns:
+        data_dict (dict): A dict with keys for the community ID and for the
+            cliques that it contains, in the format of the
+            'communities_cliques' results of `CFinder.load`. Communities are
+            numbered in order of their lowest clique ID.
+    """
+    eligible = bytearray()
+    parent = array('q')
+    for a, b, _ in _adjacency(file_path, k, chunk_size, tmp_dir, eligible):
+        if len(parent) < len(eligible):
+            parent.extend(range(len(parent), len(eligible)))
+        _union(parent, a, b)
+    parent.extend(range(len(parent), len(eligible)))
+
+    components = defaultdict(list)
+    for c, is_eligible in enumerate(eligible):
+        if is_eligible:
+            components[_find(parent, c)].append(c)
+
+    data_dict = {'community': [], 'cliques': []}
+    for i, cliques in enumerate(sorted(components.values())):
+        data_dict['community'].append(i)
+        data_dict['cliques'].append(tuple(cliques))
+    return data_dict
+
+
+def _adjacency(file_path, k, chunk_size, tmp_dir, eligible):
+    """_adjacency
+    Implements `clique_adjacency`. If eligible is a bytearray, it is filled
+    with a flag per clique ID marking the cliques of size at least k.
+    """
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as run_dir:
+        memberships = _SortedRuns(run_dir, 'vertices', chunk_size)
+        for c, vertices in iter_community_file(file_path):
+            if len(vertices) < k:
+                continue
+            if eligible is not None:
+                if len(eligible) <= c:
+                    eligible.extend(bytes(c + 1 - len(eligible)))
+                eligible[c] = 1
+            for v in vertices:
+                memberships.add((v, c))
+
+        pairs = _SortedRuns(run_dir, 'pairs', chunk_size, counts=True)
+        for _, group in groupby(memberships.merged(), key=lambda r: r[0]):
+            _pair_cliques((c for _, c in group), pairs, run_dir, chunk_size)
+        memberships.close()
+
+        for (a, b), group in groupby(pairs.merged(), key=lambda r: r[0]):
+            overlap = sum(n for _, n in group)
+            if overlap >= k - 1:
+                yield a, b, overlap
+        pairs.close()
+
+
+def _pair_cliques(cliques, pairs, run_dir, block_size):
+    """_pair_cliques
+    Adds every pair of the cliques of a vertex to pairs. If there are more
+    than block_size cliques, they are spilled to disk and each block is
+    paired with itself and then with each later block, so that at most two
+    blocks are held in memory.
+    """
+    block = []
+    path = os.path.join(run_dir, 'group')
+    f = None
+    for c in cliques:
+        block.append(c)
+        if len(block) >= block_size:
+            if f is None:
+                f = open(path, 'w')
+            f.write(''.join('{}\n'.format(b) for b in block))
+            block = []
+
+    if f is None:
+        _pair_block(block, block, pairs)
+        return
+    f.write(''.join('{}\n'.format(b) for b in block))
+    f.close()
+
+    for i, first in enumerate(_read_blocks(path, block_size)):
+        _pair_block(first, first, pairs)
+        for j, second in enumerate(_read_blocks(path, block_size)):
+            if j > i:
+                _pair_block(first, second, pairs)
+    os.remove(path)
+
+
+def _pair_block(first, second, pairs):
+    """_pair_block
+    Adds each pair of a clique in first and a later clique in second.
+    """
+    for a in first:
+        for b in second:
+            if a < b:
+                pairs.add((a, b))
+
+
+def _read_blocks(path, block_size):
+    """_read_blocks
+    Reads a file of clique IDs back in blocks of block_size.
+    """
+    with open(path, 'r') as f:
+        block = []
+        for line in f:
+            block.append(int(line))
+            if len(block) >= block_size:
+                yield block
+                block = []
+        if block:
+            yield block
+
+
+def _find(parent, c):
+    """_find
+    Finds the root of a clique in a union-find parent array, halving paths
+    on the way.
+    """
+    while parent[c] != c:
+        parent[c] = parent[parent[c]]
+        c = parent[c]
+    return c
+
+
+def _union(parent, a, b):
+    """_union
+    Joins the sets of two cliques in a union-find parent array.
+    """
+    root_a, root_b = _find(parent, a), _find(parent, b)
+    if root_a != root_b:
+        parent[max(root_a, root_b)] = min(root_a, root_b)
+
+
+class _SortedRuns():
+
+    def __init__(self, run_dir, name, chunk_size, counts=False):
+        """_SortedRuns
+        An external sort. Records are buffered and spilled to disk as sorted
+        runs whenever chunk_size records are held, and `merged` streams them
+        back in order.
+
+        Args:
+            run_dir (str): Directory for the run files.
+            name (str): Prefix of the run file names.
+            chunk_size (int): Maximum number of records held in memory.
+            counts (bool): If True, records are (int, int) pairs that are
+                counted in memory before spilling, and merged records are
+                ((int, int), count). Otherwise records are (vertex, int)
+                pairs. Defaults to False.
+        """
+        self.run_dir = run_dir
+        self.name = name
+        self.chunk_size = chunk_size
+        self.counts = counts
+        self.paths = []
+        self.buffer = defaultdict(int) if counts else []
+
+    def add(self, record):
+        if self.counts:
+            self.buffer[record] += 1
+        else:
+            self.buffer.append(record)
+        if len(self.buffer) >= self.chunk_size:
+            self._spill()
+
+    def merged(self):
+        runs = [self._read(path) for path in self.paths]
+        runs.append(iter(self._sorted_buffer()))
+        return heapq.merge(*runs)
+
+    def close(self):
+        for path in self.paths:
+            os.remove(path)
+        self.paths = []
+        self.buffer = defaultdict(int) if self.counts else []
+
+    def _sorted_buffer(self):
+        if self.counts:
+            return sorted(self.buffer.items())
+        return sorted(self.buffer)
+
+    def _spill(self):
+        path = os.path.join(
+                self.run_dir, '{}_{}'.format(self.name, len(self.paths)))
+        with open(path, 'w') as f:
+            for record in self._sorted_buffer():
+                if self.counts:
+                    (a, b), n = record
+                    f.write('{} {} {}\n'.format(a, b, n))
+                else:
+                    f.write('{}\t{}\n'.format(*record))
+        self.paths.append(path)
+        self.buffer = defaultdict(int) if self.counts else []
+
+    def _read(self, path):
+        with open(path, 'r') as f:
+            for line in f:
+                if self.counts:
+                    a, b, n = line.split(' ')
+                    yield (int(a), int(b)), int(n)
+                else:
+                    v, c = line.rstrip('\n').split('\t')
+                    yield v, int(c)
@@ -0,0 +1,135 @@
+from collections import defaultdict
+
+
+def sorted_tuple(vertices):
+    """sorted_tuple
+    Sorts vertices in to a tuple, falling back to string ordering when the
+    vertices are of mixed types (e.g. ints and labels).
+
+    Args:
+        vertices (iterable): Vertex names.
+
+    Returns:
+        (tuple): Sorted vertices.
+    """
+    try:
+        return tuple(sorted(vertices))
+    except TypeError:
+        return tuple(sorted(vertices, key=str))
+
+
+def build_adjacency(edges):
+    """build_adjacency
+    Builds an undirected adjacency dict from an edge list. Self loops are
+    ignored and any weights are dropped.
+
+    Args:
+        edges (iterable): Edges as (source, target) or
+            (source, target, weight) tuples.
+
+    Returns:
+        adjacency (defaultdict): Mapping of vertex to its set of neighbours.
+    """
+    adjacency = defaultdict(set)
+    for edge in edges:
+        s, t = edge[0], edge[1]
+        if s == t:
+            continue
+        adjacency[s].add(t)
+        adjacency[t].add(s)
+    return adjacency
+
+
+def maximal_cliques(adjacency, candidates=None):
+    """maximal_cliques
+    Finds the maximal cliques of the subgraph induced by candidates using
+    Bron-Kerbosch with pivoting.
+
+    Args:
+        adjacency (dict): Mapping of vertex to its set of neighbours.
+        candidates (iterable): Vertices of the induced subgraph. If None, the
+            whole graph is used. Defaults to None.
+
+    Returns:
+        cliques (list): Maximal cliques as frozensets.
+    """
+    if candidates is None:
+        candidates = set(adjacency)
+    else:
+        candidates = set(candidates)
+
+    cliques = []
+    stack = [(frozenset(), candidates, set())]
+    while stack:
+        r, p, x = stack.pop()
+        if not p and not x:
+            if r:
+                cliques.append(r)
+            continue
+        pivot = max(p | x, key=lambda u: len(adjacency[u] & p))
+        for v in list(p - adjacency[pivot]):
+            neighbours = adjacency[v]
+            stack.append((r | {v}, p & neighbours, x & neighbours))
+            p.remove(v)
+            x.add(v)
+    return cliques
+
+
+def adjacent_cliques(clique_id, cliques, vertex_cliques, k):
+    """adjacent_cliques
+    Finds the cliques that are k-clique adjacent to a clique, i.e. those of
+    size at least k sharing at least k - 1 vertices with it.
+
+    Args:
+        clique_id (int): ID of the clique.
+        cliques (dict): Mapping of clique ID to frozenset of vertices.
+        vertex_cliques (dict): Mapping of vertex to the set of clique IDs
+            that contain it.
+        k (int): The k-clique size.
+
+    Returns:
+        (set): IDs of the adjacent cliques.
+    """
+    overlaps = defaultdict(int)
+    for v in cliques[clique_id]:
+        for other in vertex_cliques.get(v, ()):
+            if other != clique_id:
+                overlaps[other] += 1
+    return {c for c, n in overlaps.items()
+            if n >= k - 1 and len(cliques[c]) >= k}
+
+
+def percolate(clique_ids, cliques, vertex_cliques, k):
+    """percolate
+    Groups cliques in to k-clique communities. Only adjacency between the
+    given cliques is followed.
+
+    Args:
+        clique_ids (iterable): IDs of the cliques to percolate. Cliques
+            smaller than k are skipped.
+        cliques (dict): Mapping of clique ID to frozenset of vertices.
+        vertex_cliques (dict): Mapping of vertex to the set of clique IDs
+            that contain it.
+        k (int): The k-clique size.
+
+    Returns:
+        components (list): Sets of clique IDs, one per community.
+    """
+    pool = {c for c in clique_ids if len(cliques[c]) >= k}
+    seen = set()
+    components = []
+    for start in pool:
+        if start in seen:
+            continue
+        seen.add(start)
+        component = {start}
+        stack = [start]
+        while stack:
+            c = stack.pop()
+            for other in adjacent_cliques(c, cliques, vertex_cliques, k):
+                if other in pool and other not in seen:
+                    seen.add(other)
+                    component.add(other)
+                    stack.append(other)
+        components.append(component)
+    return components
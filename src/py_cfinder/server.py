@@ -0,0 +1,536 @@
+"""
+A local job server that runs CFinder jobs on a warm pool of worker
+processes.
+
+Start it with::
+
+    python -m py_cfinder.server --socket /tmp/py_cfinder.sock
+
+and submit jobs with `JobClient`. Each worker creates its `CFinder` once,
+so clients do not pay for locating the tool and licence on every call.
+Parsed results are written to a cache directory as arrays, keyed by the
+job, and clients read them back through a memory map without parsing or
+unpickling them.
+
+The server runs jobs on behalf of any client that can reach it, so by
+default it only listens on a Unix socket that is private to its user.
+`find` jobs may only write inside the cache directory and cannot delete
+their output.
+"""
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+import uuid
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+from py_cfinder.cfinder import CFinder
+from py_cfinder.checkpoint import hash_file
+from py_cfinder.shared import MappedResultsHandle
+from py_cfinder.shared import map_results
+
+METHODS = ('find', 'load')
+PATH_ARGUMENTS = ('i', 'o', 'output_dir')
+
+_cfinder = None
+
+
+def read_result(result_path):
+    """read_result
+    Opens a job result file written by the server.
+
+    Args:
+        result_path (str): Path of a result file written by the server.
+
+    Returns:
+        (MappedResultsHandle): Handle whose `attach` memory-maps the
+            results as NumPy arrays and whose `to_dict` copies them out in
+            the format of `CFinder.find` or `CFinder.load`.
+    """
+    return MappedResultsHandle.read(result_path)
+
+
+def job_key(method, kwargs):
+    """job_key
+    Builds the cache key of a job from its method and arguments. For `find`
+    the contents of the input file are hashed along with the options,
+    including the output directory, so a cached job has written to the
+    output directory that was asked for. For `load` the names, sizes and
+    modification times of the files in the output directory are hashed.
+
+    Args:
+        method (str): 'find' or 'load'.
+        kwargs (dict): Keyword arguments of the method.
+
+    Returns:
+        (str): Hex digest identifying the job.
+    """
+    h = hashlib.sha256()
+    h.update(method.encode())
+    options = dict(kwargs)
+    if method == 'find':
+        h.update(hash_file(options['i']).encode())
+    else:
+        output_dir = options.get('output_dir')
+        for root, _, files in sorted(os.walk(output_dir)):
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                h.update('{} {} {}'.format(
+                    os.path.relpath(os.path.join(root, name), output_dir),
+                    stat.st_size, stat.st_mtime_ns).encode())
+    h.update(json.dumps(options, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def _init_worker(licence_path):
+    """_init_worker
+    Creates the CFinder instance that a worker process reuses for all of
+    its jobs.
+    """
+    global _cfinder
+    _cfinder = CFinder(licence_path)
+
+
+def _warm_up():
+    """_warm_up
+    No-op job used to start the worker processes ahead of the first job.
+    """
+    return os.getpid()
+
+
+def _run_job(method, kwargs, result_path):
+    """_run_job
+    Runs a job in a worker process and writes its result file.
+    """
+    map_results(getattr(_cfinder, method)(**kwargs), result_path)
+    return result_path
+
+
+class JobServer():
+
+    def __init__(self, address, workers=2, cache_dir=None, max_pending=None,
+                 licence_path=None, retention=3600):
+        """JobServer
+        A local HTTP server that queues CFinder jobs and runs them on a pool
+        of worker processes.
+
+        The API is:
+
+        * POST /jobs with a JSON body {"method": "find" or "load",
+          "kwargs": {...}} queues a job and returns its job_id.
+        * GET /jobs/<job_id> returns the job's status, one of 'queued',
+          'running', 'done' or 'failed', with its result_path when done.
+
+        Paths in the arguments must be absolute, as the server does not
+        share the client's working directory. A job that is identical to one already queued or running shares
+        its run rather than starting another. `find` jobs without an output
+        directory are given their own, in the cache directory, so concurrent
+        jobs never share one. An output directory outside the cache
+        directory or in use by another pending job, or delete_output, is
+        refused.
+
+        Args:
+            address (str or tuple): Path of a Unix socket, or a (host, port)
+                tuple to listen on TCP.
+            workers (int): Number of worker processes, which bounds how many
+                jobs run at once. Defaults to 2.
+            cache_dir (str): Directory for result files. Jobs whose result
+                is already cached are not run again. If None, a temporary
+                directory is used. Defaults to None.
+            max_pending (int): Maximum number of queued and running jobs.
+                Further jobs are refused with HTTP 503. If None, there is no
+                limit. Defaults to None.
+            licence_path (str): The file path for the CFinder licence file,
+                passed to each worker's `CFinder`. Defaults to None.
+            retention (float): Seconds that a finished job's status is kept
+                for. Its result file stays in the cache. Defaults to 3600.
+        """
+        self.address = address
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retention = retention
+        if cache_dir is None:
+            cache_dir = tempfile.mkdtemp(prefix='py_cfinder_')
+        os.makedirs(cache_dir, exist_ok=True)
+        self.cache_dir = os.path.abspath(cache_dir)
+
+        self.jobs = {}
+        self._pending = 0
+        self._running = {}
+        self._outputs = {}
+        self._finished = deque()
+        self._lock = threading.Lock()
+        self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(licence_path,),
+                )
+        for future in [self._executor.submit(_warm_up)
+                       for _ in range(workers)]:
+            future.result()
+
+        if isinstance(address, str):
+            if os.path.exists(address):
+                os.remove(address)
+            self._httpd = _UnixHTTPServer(address, _JobHandler)
+            os.chmod(address, 0o600)
+        else:
+            self._httpd = ThreadingHTTPServer(address, _JobHandler)
+        self._httpd.job_server = self
+        self._thread = None
+
+    def serve_forever(self):
+        """serve_forever
+        Handles requests until `shutdown` is called.
+        """
+        self._httpd.serve_forever()
+
+    def start(self):
+        """start
+        Handles requests on a background thread.
+        """
+        self._thread = threading.Thread(target=self.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        """shutdown
+        Stops handling requests and shuts down the worker pool. Result files
+        are kept.
+        """
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        self._executor.shutdown()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+    def submit(self, method, kwargs):
+        """submit
+        Queues a job, or completes it straight away if its result is cached.
+
+        Args:
+            method (str): 'find' or 'load'.
+            kwargs (dict): Keyword arguments of the method.
+
+        Returns:
+            job_id (str): ID of the job.
+        """
+        if method not in METHODS:
+            raise ValueError("method must be one of {}".format(METHODS))
+        kwargs = dict(kwargs)
+        for name in PATH_ARGUMENTS:
+            if (kwargs.get(name) is not None
+                    and not os.path.isabs(kwargs[name])):
+                raise ValueError("{} must be an absolute path".format(name))
+        if method == 'find':
+            if kwargs.get('delete_output'):
+                raise ValueError("delete_output is not allowed")
+            if kwargs.get('o') is not None:
+                kwargs['o'] = os.path.normpath(kwargs['o'])
+                if os.path.commonpath(
+                        [kwargs['o'], self.cache_dir]) != self.cache_dir:
+                    raise ValueError(
+                            "o must be inside {}".format(self.cache_dir)
+                            )
+        key = job_key(method, kwargs)
+        if method == 'find' and kwargs.get('o') is None:
+            kwargs['o'] = os.path.join(self.cache_dir, key)
+        result_path = os.path.join(self.cache_dir, '{}.results'.format(key))
+        job_id = uuid.uuid4().hex
+
+        output_dir = kwargs.get('o') if method == 'find' else None
+
+        with self._lock:
+            self._evict()
+            if os.path.exists('{}.layout'.format(result_path)):
+                self.jobs[job_id] = {'result_path': result_path,
+                                     'future': None}
+                self._finished.append((time.monotonic(), job_id))
+                return job_id
+            if key in self._running:
+                future, job_ids = self._running[key]
+                job_ids.append(job_id)
+                self.jobs[job_id] = {'result_path': result_path,
+                                     'future': future}
+                return job_id
+            if output_dir in self._outputs:
+                raise ValueError(
+                        "o is in use by another job: {}".format(output_dir)
+                        )
+            if (self.max_pending is not None
+                    and self._pending >= self.max_pending):
+                raise _QueueFull()
+            future = self._executor.submit(
+                    _run_job, method, kwargs, result_path)
+            self._pending += 1
+            self._running[key] = (future, [job_id])
+            if output_dir is not None:
+                self._outputs[output_dir] = key
+            self.jobs[job_id] = {'result_path': result_path,
+                                 'future': future}
+        future.add_done_callback(
+                lambda _: self._job_done(key, output_dir))
+        return job_id
+
+    def _job_done(self, key, output_dir):
+        """_job_done
+        Counts a run as no longer pending and starts the retention period
+        of each job that shared it.
+        """
+        with self._lock:
+            self._pending -= 1
+            _, job_ids = self._running.pop(key)
+            self._outputs.pop(output_dir, None)
+            now = time.monotonic()
+            for job_id in job_ids:
+                self._finished.append((now, job_id))
+
+    def _evict(self):
+        """_evict
+        Forgets finished jobs whose retention period has passed. Entries in
+        _finished are in order of finishing, so only expired entries are
+        visited.
+        """
+        expiry = time.monotonic() - self.retention
+        while self._finished and self._finished[0][0] <= expiry:
+            _, job_id = self._finished.popleft()
+            self.jobs.pop(job_id, None)
+
+    def status(self, job_id):
+        """status
+        Returns the status of a job. Jobs are forgotten once they have been
+        finished for longer than the retention period.
+
+        Args:
+            job_id (str): ID of the job.
+
+        Returns:
+            (dict): The job_id, status, and the result_path or error.
+        """
+        job = self.jobs[job_id]
+        future = job['future']
+        status = {'job_id': job_id}
+        if future is None or (future.done() and future.exception() is None):
+            status['status'] = 'done'
+            status['result_path'] = job['result_path']
+        elif future.done():
+            status['status'] = 'failed'
+            status['error'] = repr(future.exception())
+        elif future.running():
+            status['status'] = 'running'
+        else:
+            status['status'] = 'queued'
+        return status
+
+
+class _QueueFull(Exception):
+    pass
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn,
+                      socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _JobHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/jobs':
+            return self._send(404, {'error': 'not found'})
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length))
+            job_id = self.server.job_server.submit(
+                    body['method'], body.get('kwargs', {}))
+        except _QueueFull:
+            return self._send(503, {'error': 'too many pending jobs'})
+        except (KeyError, ValueError, TypeError, OSError) as e:
+            return self._send(400, {'error': repr(e)})
+        self._send(202, self.server.job_server.status(job_id))
+
+    def do_GET(self):
+        parts = self.path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] != 'jobs':
+            return self._send(404, {'error': 'not found'})
+        try:
+            status = self.server.job_server.status(parts[1])
+        except KeyError:
+            return self._send(404, {'error': 'unknown job'})
+        self._send(200, status)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+
+    def __init__(self, socket_path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class JobClient():
+
+    def __init__(self, address, timeout=None):
+        """JobClient
+        A client for a `JobServer`.
+
+        Args:
+            address (str or tuple): Path of the server's Unix socket, or its
+                (host, port) tuple.
+            timeout (float): Socket timeout in seconds. Defaults to None.
+        """
+        self.address = address
+        self.timeout = timeout
+
+    def find(self, **kwargs):
+        """find
+        Runs `CFinder.find` on the server and waits for its result.
+        """
+        return self.result(self.submit('find', **kwargs)).to_dict()
+
+    def load(self, **kwargs):
+        """load
+        Runs `CFinder.load` on the server and waits for its result.
+        """
+        return self.result(self.submit('load', **kwargs)).to_dict()
+
+    def submit(self, method, **kwargs):
+        """submit
+        Queues a job on the server. Relative paths in the arguments are made
+        absolute first, against this process's working directory.
+
+        Args:
+            method (str): 'find' or 'load'.
+            **kwargs: Keyword arguments of the method.
+
+        Returns:
+            job_id (str): ID of the job.
+        """
+        for name in PATH_ARGUMENTS:
+            if kwargs.get(name) is not None:
+                kwargs[name] = os.path.abspath(kwargs[name])
+        status = self._request(
+                'POST', '/jobs', {'method': method, 'kwargs': kwargs})
+        return status['job_id']
+
+    def status(self, job_id):
+        """status
+        Returns the status of a job. See `JobServer.status`.
+        """
+        return self._request('GET', '/jobs/{}'.format(job_id))
+
+    def result(self, job_id, timeout=None, poll_interval=0.5):
+        """result
+        Waits for a job to finish and opens its result.
+
+        Args:
+            job_id (str): ID of the job.
+            timeout (float): Seconds to wait before raising TimeoutError. If
+                None, waits indefinitely. Defaults to None.
+            poll_interval (float): Seconds between status requests. Defaults
+                to 0.5.
+
+        Returns:
+            (MappedResultsHandle): Handle of the memory-mapped results. See
+                `read_result`.
+        """
+        start = time.monotonic()
+        while True:
+            status = self.status(job_id)
+            if status['status'] == 'done':
+                return read_result(status['result_path'])
+            if status['status'] == 'failed':
+                raise RuntimeError(
+                        "Job {} failed: {}".format(job_id, status['error'])
+                        )
+            if timeout is not None and time.monotonic() - start > timeout:
+                raise TimeoutError("Job {} did not finish".format(job_id))
+            time.sleep(poll_interval)
+
+    def _request(self, method, path, payload=None):
+        if isinstance(self.address, str):
+            conn = _UnixHTTPConnection(self.address, timeout=self.timeout)
+        else:
+            conn = http.client.HTTPConnection(*self.address,
+                                              timeout=self.timeout)
+        try:
+            body = None if payload is None else json.dumps(payload)
+            conn.request(method, path, body=body,
+                         headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            data = json.loads(response.read())
+        finally:
+            conn.close()
+        if response.status >= 400:
+            raise RuntimeError(
+                    "Server returned {}: {}".format(
+                        response.status, data.get('error'))
+                    )
+        return data
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+            description='Run a local py_cfinder job server.')
+    parser.add_argument('--socket',
+                        default=os.path.join(tempfile.gettempdir(),
+                                             'py_cfinder.sock'),
+                        help="Path of the Unix socket to use.")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="Host to listen on with --port.")
+    parser.add_argument('--port', type=int,
+                        help=("Listen on TCP at this port instead of the Unix "
+                              "socket. Any local user can then submit jobs."))
+    parser.add_argument('--workers', type=int, default=2,
+                        help="Number of worker processes.")
+    parser.add_argument('--cache-dir', help="Directory for result files.")
+    parser.add_argument('--max-pending', type=int,
+                        help="Maximum number of queued and running jobs.")
+    parser.add_argument('--licence', help="Path of the CFinder licence.")
+    args = parser.parse_args(args=args)
+
+    if args.port is None:
+        address = args.socket
+    else:
+        address = (args.host, args.port)
+    server = JobServer(address, workers=args.workers,
+                       cache_dir=args.cache_dir,
+                       max_pending=args.max_pending,
+                       licence_path=args.licence)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,418 @@
+"""
+Shared memory transport for parsed CFinder results.
+
+Passing results back from worker processes normally pickles every clique
+and community. Instead, a worker can copy its results in to a single
+`multiprocessing.shared_memory` block with `share_results` and return the
+small, picklable `SharedResultsHandle`. The parent attaches to the block and
+reads the results as NumPy arrays without copying them::
+
+    from multiprocessing import Pool
+
+    from py_cfinder.shared import load_shared
+
+    with Pool(4) as pool:
+        handles = pool.map(load_shared, output_dirs)
+
+    for handle in handles:
+        with handle.attach() as shared:
+            vertices = shared.arrays[3]['communities']['vertices']
+            offsets = shared.arrays[3]['communities']['vertices_offsets']
+            ...
+        handle.unlink()
+
+Ragged values, such as the vertices of each clique, are stored flat with an
+'<key>_offsets' array, so that the values of row i are
+values[offsets[i]:offsets[i + 1]]. Vertex names that are not all numbers
+are stored as strings.
+
+Blocks are not tracked by any process once they are created. The process
+that receives a handle owns the block and must call `unlink` when it is
+done with it, otherwise the block lives until the machine restarts.
+
+Results that should outlive the processes, such as cached results, can be
+written to a file with `map_results` instead, using the same layout, and
+read back through a memory map with `MappedResultsHandle`.
+"""
+import mmap
+import os
+import pickle
+import sys
+
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from py_cfinder.cfinder import CFinder
+
+ALIGNMENT = 64
+
+
+def share_results(results):
+    """share_results
+    Copies results in to a new shared memory block.
+
+    Args:
+        results (dict): Results from `CFinder.load`, or the cliques dict
+            returned by `CFinder.find`.
+
+    Returns:
+        (SharedResultsHandle): Handle of the shared memory block.
+    """
+    arrays, layout, size = _plan(results)
+    shm = _open_shared_memory(create=True, size=size)
+    try:
+        _copy_arrays(shm.buf, arrays, layout)
+    except BaseException:
+        shm.close()
+        _unlink_shared_memory(shm)
+        raise
+    shm.close()
+
+    return SharedResultsHandle(shm.name, layout)
+
+
+def map_results(results, file_path):
+    """map_results
+    Writes results to a file that can be memory-mapped with
+    `MappedResultsHandle`. The layout is written alongside it, to
+    '<file_path>.layout', once the data is complete, so the presence of the
+    layout file marks a finished write.
+
+    Args:
+        results (dict): Results from `CFinder.load`, or the cliques dict
+            returned by `CFinder.find`.
+        file_path (str): Path of the data file.
+
+    Returns:
+        (MappedResultsHandle): Handle of the file.
+    """
+    arrays, layout, size = _plan(results)
+    tmp_path = '{}.{}.tmp'.format(file_path, os.getpid())
+    with open(tmp_path, 'w+b') as f:
+        f.truncate(size)
+        with mmap.mmap(f.fileno(), size) as m:
+            _copy_arrays(m, arrays, layout)
+    os.replace(tmp_path, file_path)
+
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(layout, f)
+    os.replace(tmp_path, '{}.layout'.format(file_path))
+
+    return MappedResultsHandle(file_path, layout)
+
+
+def find_shared(i, o=None, **kwargs):
+    """find_shared
+    Runs `CFinder.find` and returns its cliques in shared memory. Suitable as
+    a `multiprocessing.Pool` target.
+
+    Args:
+        i (str): Input file dir.
+        o (str): Output dir.
+        **kwargs: Other arguments of `CFinder.find`.
+
+    Returns:
+        (SharedResultsHandle): Handle of the shared memory block.
+    """
+    return share_results(CFinder().find(i, o=o, **kwargs))
+
+
+def load_shared(output_dir, directed=False):
+    """load_shared
+    Runs `CFinder.load` and returns its results in shared memory. Suitable as
+    a `multiprocessing.Pool` target.
+
+    Args:
+        output_dir (str): CFinder output directory.
+        directed (bool): Load the directed results. Defaults to False.
+
+    Returns:
+        (SharedResultsHandle): Handle of the shared memory block.
+    """
+    return share_results(CFinder().load(output_dir, directed=directed))
+
+
+class SharedResultsHandle():
+
+    def __init__(self, name, layout):
+        """SharedResultsHandle
+        A picklable reference to results held in shared memory.
+
+        Args:
+            name (str): Name of the shared memory block.
+            layout (list): (path, kind, dtype, shape, offset) of each array
+                in the block, where path is the sequence of keys leading to
+                it in the results and kind is one of 'flat', 'values',
+                'offsets' or 'none'.
+        """
+        self.name = name
+        self.layout = layout
+
+    def attach(self):
+        """attach
+        Maps the block in to this process.
+
+        Returns:
+            (SharedResults): Zero-copy views of the results.
+        """
+        return SharedResults(self)
+
+    def to_dict(self):
+        """to_dict
+        Copies the results out of shared memory in to their original format.
+
+        Returns:
+            results (dict): Results in the format of `CFinder.load` or
+                `CFinder.find`.
+        """
+        with self.attach() as shared:
+            return shared.to_dict()
+
+    def _open(self):
+        shm = _open_shared_memory(name=self.name)
+        return shm.buf, shm.close
+
+    def unlink(self):
+        """unlink
+        Frees the block. Views attached in other processes stay valid until
+        they are closed.
+        """
+        shm = shared_memory.SharedMemory(name=self.name)
+        shm.close()
+        shm.unlink()
+
+    def __repr__(self):
+        return 'SharedResultsHandle({!r})'.format(self.name)
+
+
+class MappedResultsHandle():
+
+    def __init__(self, file_path, layout):
+        """MappedResultsHandle
+        A picklable reference to results written by `map_results`.
+
+        Args:
+            file_path (str): Path of the data file.
+            layout (list): Layout of the arrays in the file, as for
+                `SharedResultsHandle`.
+        """
+        self.file_path = file_path
+        self.layout = layout
+
+    @classmethod
+    def read(cls, file_path):
+        """read
+        Returns the handle of a file written by `map_results`.
+
+        Args:
+            file_path (str): Path of the data file.
+
+        Returns:
+            (MappedResultsHandle): Handle of the file.
+        """
+        with open('{}.layout'.format(file_path), 'rb') as f:
+            return cls(file_path, pickle.load(f))
+
+    def attach(self):
+        """attach
+        Memory-maps the file in to this process.
+
+        Returns:
+            (SharedResults): Zero-copy, read-only views of the results.
+        """
+        return SharedResults(self)
+
+    def to_dict(self):
+        """to_dict
+        Copies the results out of the file in to their original format.
+
+        Returns:
+            results (dict): Results in the format of `CFinder.load` or
+                `CFinder.find`.
+        """
+        with self.attach() as shared:
+            return shared.to_dict()
+
+    def _open(self):
+        with open(self.file_path, 'rb') as f:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return m, m.close
+
+    def __repr__(self):
+        return 'MappedResultsHandle({!r})'.format(self.file_path)
+
+
+class SharedResults():
+
+    def __init__(self, handle):
+        """SharedResults
+        Views of results held in shared memory or a memory-mapped file. The
+        arrays are only valid until `close` is called, so copy anything that
+        must outlive it. Usable as a context manager that closes on exit.
+
+        Args:
+            handle (SharedResultsHandle or MappedResultsHandle): Handle of
+                the shared memory block or file.
+        """
+        self.handle = handle
+        self._buffer, self._close = handle._open()
+        self.arrays = {}
+        for path, kind, dtype, shape, offset in handle.layout:
+            if kind == 'none':
+                array = None
+            else:
+                array = np.ndarray(shape, dtype=dtype, buffer=self._buffer,
+                                   offset=offset)
+            if kind == 'offsets':
+                path = path[:-1] + ('{}_offsets'.format(path[-1]),)
+            _set_path(self.arrays, path, array)
+
+    def to_dict(self):
+        """to_dict
+        Copies the results out of shared memory in to their original format.
+
+        Returns:
+            results (dict): Results in the format of `CFinder.load` or
+                `CFinder.find`.
+        """
+        results = {}
+        for path, kind, _, _, _ in self.handle.layout:
+            parent = _get_path(self.arrays, path[:-1])
+            key = path[-1]
+            if kind == 'none':
+                value = None
+            elif kind == 'flat':
+                value = parent[key].tolist()
+            elif kind == 'values':
+                values = parent[key]
+                offsets = parent['{}_offsets'.format(key)]
+                value = []
+                for start, end in zip(offsets[:-1], offsets[1:]):
+                    row = values[start:end].tolist()
+                    if values.ndim > 1:
+                        value.append([tuple(v) for v in row])
+                    else:
+                        value.append(tuple(row))
+            else:
+                continue
+            _set_path(results, path, value)
+        return results
+
+    def close(self):
+        """close
+        Unmaps the block or file from this process. A shared memory block
+        itself is kept until `SharedResultsHandle.unlink` is called.
+        """
+        self.arrays = {}
+        self._buffer = None
+        self._close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _plan(results):
+    """_plan
+    Flattens results in to arrays and lays them out in a single buffer.
+
+    Returns:
+        (tuple): The arrays, their layout and the buffer size in bytes.
+    """
+    arrays = []
+    _flatten(results, (), arrays)
+
+    layout = []
+    size = 0
+    for path, kind, array in arrays:
+        if array is None:
+            layout.append((path, kind, None, None, None))
+            continue
+        size = -(-size // ALIGNMENT) * ALIGNMENT
+        layout.append((path, kind, array.dtype.str, array.shape, size))
+        size += array.nbytes
+    return arrays, layout, max(size, 1)
+
+
+def _copy_arrays(buffer, arrays, layout):
+    """_copy_arrays
+    Copies arrays in to a buffer at the offsets of their layout.
+    """
+    for (_, _, array), (_, _, dtype, shape, offset) in zip(arrays, layout):
+        if array is not None:
+            view = np.ndarray(shape, dtype=dtype, buffer=buffer,
+                              offset=offset)
+            view[...] = array
+            del view
+
+
+def _flatten(value, path, arrays):
+    """_flatten
+    Collects (path, kind, array) for each list in the results.
+    """
+    if value is None:
+        arrays.append((path, 'none', None))
+    elif isinstance(value, dict):
+        for key, v in value.items():
+            _flatten(v, path + (key,), arrays)
+    elif len(value) > 0 and isinstance(value[0], (tuple, list)):
+        offsets = np.zeros(len(value) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(row) for row in value])
+        flat = [v for row in value for v in row]
+        arrays.append((path, 'values', _to_array(flat)))
+        arrays.append((path, 'offsets', offsets))
+    else:
+        arrays.append((path, 'flat', _to_array(value)))
+
+
+def _to_array(values):
+    """_to_array
+    Converts a list of numbers, names or pairs to an array, falling back to
+    strings when the types are mixed.
+    """
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64)
+    array = np.asarray(values)
+    if array.dtype == object:
+        array = np.asarray(values, dtype=str)
+    return array
+
+
+def _get_path(d, path):
+    for key in path:
+        d = d[key]
+    return d
+
+
+def _set_path(d, path, value):
+    for key in path[:-1]:
+        d = d.setdefault(key, {})
+    d[path[-1]] = value
+
+
+def _open_shared_memory(name=None, create=False, size=0):
+    """_open_shared_memory
+    Opens a shared memory block without registering it with the resource
+    tracker, which would otherwise free it when the creating worker exits.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, create=create,
+                                          size=size, track=False)
+    shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+    resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+def _unlink_shared_memory(shm):
+    """_unlink_shared_memory
+    Frees a block opened with `_open_shared_memory`. Before Python 3.13,
+    unlinking also unregisters the block from the resource tracker, so it
+    is registered again first to keep the tracker consistent.
+    """
+    if sys.version_info < (3, 13):
+        resource_tracker.register(shm._name, 'shared_memory')
+    shm.unlink()
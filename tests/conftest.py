@@ -0,0 +1,62 @@
+import stat
+import sys
+
+import pytest
+
+FAKE_CFINDER = '''#!{python}
+import os
+import sys
+import time
+
+time.sleep(float(os.environ.get('FAKE_CFINDER_DELAY', '0')))
+args = sys.argv[1:]
+output_dir = args[args.index('-o') + 1]
+if '-k' in args:
+    k_values = [args[args.index('-k') + 1]]
+else:
+    max_k = int(os.environ.get('FAKE_CFINDER_MAX_K', '3'))
+    k_values = [str(k) for k in range(3, max_k + 1)]
+header = '# header\\n' * 6 + '\\n'
+k_files = {{
+    'communities': '0: a b c \\n1: a d e \\n',
+    'communities_cliques': '0: 0 \\n1: 1 \\n',
+    'communities_links': '0:\\na b\\na c\\nb c\\n1:\\na d\\na e\\nd e\\n',
+    'graph_of_communities_graph': '0 1\\n',
+    'degree_distribuion': '1 2\\n\\n',
+    'membership_distribution': '0 0\\n1 4\\n2 1\\n\\n',
+    'overlap_distribution': '1 1\\n\\n',
+    'size_distribution': '3 2\\n\\n',
+}}
+os.makedirs(output_dir, exist_ok=True)
+with open(os.path.join(output_dir, 'cliques'), 'w') as f:
+    f.write(header + '0: a b c \\n1: a d e \\n')
+for k in k_values:
+    os.makedirs(os.path.join(output_dir, 'k=' + k), exist_ok=True)
+    for name, data in k_files.items():
+        with open(os.path.join(output_dir, 'k=' + k, name), 'w') as f:
+            f.write(header + data)
+for calls_path in (os.path.join(output_dir, 'calls'),
+                   os.environ.get('FAKE_CFINDER_CALLS')):
+    if calls_path:
+        with open(calls_path, 'a') as f:
+            f.write(' '.join(args) + '\\n')
+'''
+
+
+@pytest.fixture
+def fake_cfinder(tmp_path, monkeypatch):
+    """A stand-in for the CFinder tool that writes the triangle demo results
+    to its output directory, for the k given with -k or else for k=3 up to
+    $FAKE_CFINDER_MAX_K, and logs each call to a 'calls' file there, and
+    to $FAKE_CFINDER_CALLS if set. It sleeps for $FAKE_CFINDER_DELAY seconds
+    first."""
+    tool_dir = tmp_path / 'cfinder'
+    tool_dir.mkdir()
+    tool_path = tool_dir / 'CFinder_commandline'
+    tool_path.write_text(FAKE_CFINDER.format(python=sys.executable))
+    tool_path.chmod(tool_path.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv('CFINDER', str(tool_path))
+
+    input_path = tmp_path / 'triangle.txt'
+    input_path.write_text('a b\na c\na d\nb c\ne a\ne d\n')
+    return str(input_path)
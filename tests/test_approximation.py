@@ -0,0 +1,55 @@
+import pytest
+
+from py_cfinder import approximate
+from py_cfinder import approximation
+from py_cfinder import IncrementalCFinder
+
+
+@pytest.fixture
+def ring_of_cliques():
+    """Ten disjoint 4-cliques, each joined to the next by a single edge."""
+    edges = []
+    for n in range(10):
+        clique = [4 * n + i for i in range(4)]
+        edges.extend((u, v) for u in clique for v in clique if u < v)
+        edges.append((4 * n, (4 * n + 5) % 40))
+    return edges
+
+
+def test_exact_when_every_vertex_is_sampled(ring_of_cliques):
+    results = approximate(ring_of_cliques, k=3, samples=40, seed=0)
+    assert results['samples'] == results['vertices'] == 40
+    assert results['membership_distribution'] == {
+            'membership': [1], 'count': [40.0], 'lower': [40.0],
+            'upper': [40.0]}
+    size = results['size_distribution']
+    assert size['size'] == [4]
+    assert size['count'] == [pytest.approx(10.0)]
+
+
+def test_estimates_have_intervals(ring_of_cliques):
+    results = approximate(ring_of_cliques, k=3, samples=10, seed=1)
+    size = results['size_distribution']
+    exact = IncrementalCFinder(ring_of_cliques, k=3).results()
+    n_communities = len(exact[3]['communities']['community'])
+    assert size['size'] == [4]
+    assert size['lower'][0] <= n_communities <= size['upper'][0]
+    assert size['lower'][0] <= size['count'][0] <= size['upper'][0]
+
+
+def test_read_edge_file(tmp_path, ring_of_cliques):
+    file_path = tmp_path / 'edges.txt'
+    file_path.write_text('# comment\n' + ''.join(
+        '{} {} 1\n'.format(u, v) for u, v in ring_of_cliques))
+    results = approximate(str(file_path), k=3, samples=40, seed=0,
+                          max_neighbours=4)
+    assert results['vertices'] == 40
+    assert results['membership_distribution']['membership'] == [1]
+    assert approximation.read_edge_file(str(file_path)) == [
+            (str(u), str(v)) for u, v in ring_of_cliques]
+
+
+def test_max_neighbours_bounds_egos(ring_of_cliques):
+    results = approximate(ring_of_cliques, k=3, samples=40, seed=0,
+                          max_neighbours=2)
+    assert set(results['membership_distribution']['membership']) <= {0, 1}
@@ -0,0 +1,126 @@
+import os
+import shutil
+
+import pytest
+
+from py_cfinder import CFinder
+from py_cfinder import cfinder
+from py_cfinder.checkpoint import RunManifest
+
+
+@pytest.fixture
+def output_dir(tmp_path):
+    return str(tmp_path / 'output')
+
+
+def calls(output_dir):
+    with open(os.path.join(output_dir, 'calls')) as f:
+        return f.read().splitlines()
+
+
+def test_resumable_run(fake_cfinder, output_dir):
+    finished = {}
+    cf = CFinder()
+    cliques = cf.find(fake_cfinder, o=output_dir, resume=True,
+                      poll_interval=0.1,
+                      on_k_complete=lambda k, r: finished.update({k: r}))
+    assert cliques['vertices'] == [('a', 'b', 'c'), ('a', 'd', 'e')]
+    assert list(finished) == [3]
+    assert finished[3]['size_distribution'] == {'size': [3], 'count': [2]}
+
+    manifest = RunManifest.read(output_dir)
+    assert manifest.complete
+    assert manifest.finished_k == [3]
+
+
+def test_finished_run_is_reused(fake_cfinder, output_dir):
+    cf = CFinder()
+    cf.find(fake_cfinder, o=output_dir, resume=True, poll_interval=0.1)
+    finished = []
+    cf.find(fake_cfinder, o=output_dir, resume=True, poll_interval=0.1,
+            on_k_complete=lambda k, r: finished.append(k))
+    assert len(calls(output_dir)) == 1
+    assert finished == [3]
+
+
+def test_changed_options_rerun(fake_cfinder, output_dir):
+    cf = CFinder()
+    cf.find(fake_cfinder, o=output_dir, resume=True, poll_interval=0.1)
+    cf.find(fake_cfinder, o=output_dir, t=10, resume=True,
+            poll_interval=0.1)
+    assert len(calls(output_dir)) == 2
+
+
+def test_changed_options_clear_old_output(fake_cfinder, output_dir):
+    cf = CFinder()
+    cf.find(fake_cfinder, o=output_dir, k=5, resume=True, poll_interval=0.1)
+    finished = []
+    cf.find(fake_cfinder, o=output_dir, resume=True, poll_interval=0.1,
+            on_k_complete=lambda k, r: finished.append(k))
+    assert finished == [3]
+    assert not os.path.exists(os.path.join(output_dir, 'k=5'))
+    assert RunManifest.read(output_dir).finished_k == [3]
+
+
+def test_plain_run_drops_manifest(fake_cfinder, output_dir):
+    cf = CFinder()
+    cf.find(fake_cfinder, o=output_dir, resume=True, poll_interval=0.1)
+    cf.find(fake_cfinder, o=output_dir, t=10)
+    assert RunManifest.read(output_dir) is None
+
+    cf.find(fake_cfinder, o=output_dir, resume=True, poll_interval=0.1)
+    assert len(calls(output_dir)) == 3
+    assert RunManifest.read(output_dir).options['t'] is None
+
+
+def test_interrupted_run_runs_missing_k(fake_cfinder, output_dir,
+                                        monkeypatch):
+    monkeypatch.setenv('FAKE_CFINDER_MAX_K', '5')
+    cf = CFinder()
+    cf.find(fake_cfinder, o=output_dir, resume=True, poll_interval=0.1)
+
+    # Pretend the run was cut off while writing k=4.
+    shutil.rmtree(os.path.join(output_dir, 'k=5'))
+    os.remove(os.path.join(output_dir, 'k=4', 'size_distribution'))
+    manifest = RunManifest.read(output_dir)
+    manifest.finished_k = [3]
+    manifest.complete = False
+    manifest.write()
+
+    calls_path = os.path.join(os.path.dirname(output_dir), 'resume_calls')
+    monkeypatch.setenv('FAKE_CFINDER_CALLS', calls_path)
+    finished = []
+    cf.find(fake_cfinder, o=output_dir, resume=True, poll_interval=0.1,
+            on_k_complete=lambda k, r: finished.append(k))
+    # A single run without -k supplies both missing k values.
+    assert finished == [3, 4, 5]
+    with open(calls_path) as f:
+        [resume_call] = f.read().splitlines()
+    assert '-k' not in resume_call.split()
+    assert os.path.join(output_dir, '.resume') in resume_call.split()
+    assert os.path.isfile(
+            os.path.join(output_dir, 'k=4', 'size_distribution'))
+    assert not os.path.exists(os.path.join(output_dir, '.resume'))
+    manifest = RunManifest.read(output_dir)
+    assert manifest.complete
+    assert manifest.finished_k == [3, 4, 5]
+
+
+def test_failing_callback_kills_cfinder(fake_cfinder, output_dir,
+                                        monkeypatch):
+    killed = []
+    popen = cfinder.Popen
+
+    class Process(popen):
+        def kill(self):
+            killed.append(self.pid)
+            super().kill()
+
+    def fail(k, results):
+        raise RuntimeError('callback failed')
+
+    monkeypatch.setattr(cfinder, 'Popen', Process)
+    with pytest.raises(RuntimeError):
+        CFinder().find(fake_cfinder, o=output_dir, resume=True,
+                       poll_interval=0.1, on_k_complete=fail)
+    assert len(killed) == 1
@@ -0,0 +1,138 @@
+import random
+
+import pytest
+
+from py_cfinder import IncrementalCFinder
+from py_cfinder import incremental
+from py_cfinder import percolation
+
+
+@pytest.fixture
+def triangle_edges():
+    return [('a', 'b'), ('a', 'c'), ('a', 'd'), ('b', 'c'), ('e', 'a'),
+            ('e', 'd')]
+
+
+def partition(results, k):
+    return {frozenset(v) for v in results[k]['communities']['vertices']}
+
+
+def cliques(results):
+    return {frozenset(v) for v in results['cliques']['vertices']}
+
+
+def test_from_edges(triangle_edges):
+    results = IncrementalCFinder(triangle_edges, k=3).results()
+    assert cliques(results) == {frozenset('abc'), frozenset('ade')}
+    assert partition(results, 3) == {frozenset('abc'), frozenset('ade')}
+
+
+def test_insert_merges_communities(triangle_edges):
+    engine = IncrementalCFinder(triangle_edges, k=3)
+    engine.insert_edges([('b', 'd'), ('c', 'd')])
+    results = engine.results()
+    assert cliques(results) == {frozenset('abcd'), frozenset('ade')}
+    assert partition(results, 3) == {frozenset('abcde')}
+
+
+def test_delete_splits_community(triangle_edges):
+    engine = IncrementalCFinder(triangle_edges + [('b', 'd'), ('c', 'd')],
+                                k=3)
+    engine.delete_edges([('b', 'd'), ('c', 'd')])
+    results = engine.results()
+    assert cliques(results) == {frozenset('abc'), frozenset('ade')}
+    assert partition(results, 3) == {frozenset('abc'), frozenset('ade')}
+
+
+def test_split_keeps_id_on_larger_part():
+    engine = IncrementalCFinder(chain_of_triangles(50), k=3)
+    [comm] = engine.communities[3]
+    engine.delete_edges([(5, 7)])
+    results = engine.results()
+    assert results[3]['communities']['community'] == [comm, comm + 1]
+    assert results[3]['communities']['vertices'][1] == tuple(range(7))
+
+
+def chain_of_triangles(n):
+    return [(i, i + 1) for i in range(n)] + [(i, i + 2) for i in range(n - 1)]
+
+
+def test_update_cost_does_not_grow_with_graph(monkeypatch):
+    lookups = []
+
+    def counted(*args):
+        lookups.append(args[0])
+        return adjacent_cliques(*args)
+
+    adjacent_cliques = incremental.adjacent_cliques
+    monkeypatch.setattr(incremental, 'adjacent_cliques', counted)
+    monkeypatch.setattr(percolation, 'adjacent_cliques', counted)
+
+    counts = []
+    for n in (1000, 20000):
+        engine = IncrementalCFinder(chain_of_triangles(n), k=3)
+        del lookups[:]
+        engine.delete_edges([(10, 12)])
+        engine.insert_edges([(10, 12)])
+        counts.append(len(lookups))
+        assert len(engine.communities[3]) == 1
+    assert counts[0] == counts[1]
+
+
+def test_from_results_keeps_ids(triangle_edges):
+    results = {
+            'cliques': {'clique': [7, 9],
+                        'vertices': [('a', 'b', 'c'), ('a', 'd', 'e')]},
+            'graph': {'source': [s for s, _ in triangle_edges],
+                      'target': [t for _, t in triangle_edges],
+                      'weight': [1] * len(triangle_edges)},
+            3: {'communities_cliques': {'community': [4, 5],
+                                        'cliques': [(7,), (9,)]}},
+            }
+    engine = IncrementalCFinder.from_results(results)
+    engine.insert_edges([('f', 'g'), ('g', 'h'), ('f', 'h')])
+    results = engine.results()
+    assert results['cliques']['clique'] == [7, 9, 10]
+    assert results[3]['communities']['community'] == [4, 5, 6]
+
+
+def test_random_updates_match_rebuild(tmp_path):
+    rng = random.Random(0)
+    vertices = list(range(20))
+    pairs = [(u, v) for u in vertices for v in vertices if u < v]
+    edges = set(rng.sample(pairs, 70))
+    engine = IncrementalCFinder(edges, k=[3, 4])
+    state_path = str(tmp_path / 'state.json')
+
+    for _ in range(15):
+        deleted = set(rng.sample(sorted(edges), 5))
+        inserted = set(rng.sample(pairs, 5)) - edges
+        edges = (edges - deleted) | inserted
+        engine.update(inserted=inserted, deleted=deleted)
+        engine.save(state_path)
+        engine = IncrementalCFinder.restore(state_path)
+
+        expected = IncrementalCFinder(edges, k=[3, 4]).results()
+        results = engine.results()
+        assert cliques(results) == cliques(expected)
+        for k in (3, 4):
+            assert partition(results, k) == partition(expected, k)
+
+
+def test_random_inserts_match_rebuild():
+    rng = random.Random(2)
+    vertices = list(range(25))
+    pairs = [(u, v) for u in vertices for v in vertices if u < v]
+    edges = set(rng.sample(pairs, 40))
+    engine = IncrementalCFinder(edges, k=[3, 4])
+
+    for _ in range(20):
+        inserted = set(rng.sample(pairs, 4)) - edges
+        edges |= inserted
+        engine.insert_edges(inserted)
+
+        expected = IncrementalCFinder(edges, k=[3, 4]).results()
+        results = engine.results()
+        assert cliques(results) == cliques(expected)
+        for k in (3, 4):
+            assert partition(results, k) == partition(expected, k)
@@ -0,0 +1,65 @@
+import pytest
+
+from py_cfinder import compare
+from py_cfinder import matching
+
+
+@pytest.fixture
+def communities_a():
+    return {
+            'community': [0, 1, 2, 3],
+            'vertices': [(1, 2, 3, 4), (5, 6, 7, 8, 9, 10), (11, 12, 13),
+                         (14, 15, 16)]
+            }
+
+
+@pytest.fixture
+def communities_b():
+    return {
+            'community': [0, 1, 2, 3],
+            'vertices': [(1, 2, 3, 4, 11, 12, 13), (5, 6, 7), (8, 9, 10),
+                         (20, 21, 22)]
+            }
+
+
+def events(comparison):
+    e = comparison['events']
+    return set(zip(e['event'], e['communities_a'], e['communities_b']))
+
+
+def test_compare_events(communities_a, communities_b):
+    comparison = compare(communities_a, communities_b)
+    assert events(comparison) == {
+            ('merge', (0, 2), (0,)),
+            ('split', (1,), (1, 2)),
+            ('death', (3,), ()),
+            ('birth', (), (3,)),
+            }
+
+
+def test_compare_matches(communities_a, communities_b):
+    matches = compare(communities_a, communities_b)['matches']
+    assert matches['community_b'] == [0, 1, 0, None]
+    assert matches['jaccard'] == [4 / 7, 0.5, 3 / 7, 0.0]
+
+
+def test_compare_continue(communities_a):
+    comparison = compare(communities_a, communities_a)
+    assert events(comparison) == {
+            ('continue', (c,), (c,)) for c in communities_a['community']}
+
+
+def test_compare_results_by_k(communities_a, communities_b):
+    results_a = {'cliques': {}, 3: {'communities': communities_a},
+                 4: {'communities': communities_a}}
+    results_b = {'cliques': {}, 3: {'communities': communities_b}}
+    comparison = compare(results_a, results_b)
+    assert list(comparison) == [3]
+    assert events(comparison[3]) == events(
+            compare(communities_a, communities_b))
+
+
+def test_package_keeps_module():
+    import py_cfinder.matching as module
+    assert module is matching
+    assert matching.compare is compare
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from py_cfinder.overlap import clique_adjacency
+from py_cfinder.overlap import clique_components
+from py_cfinder.overlap import iter_community_file
+from py_cfinder.percolation import build_adjacency
+from py_cfinder.percolation import maximal_cliques
+from py_cfinder.percolation import percolate
+
+
+def write_cliques(file_path, cliques):
+    with open(file_path, 'w') as f:
+        f.write('# header\n' * 6)
+        f.write('\n')
+        for i, clique in enumerate(cliques):
+            f.write('{}: {} \n'.format(i, ' '.join(str(v) for v in clique)))
+
+
+@pytest.fixture
+def random_cliques():
+    rng = random.Random(1)
+    pairs = [(u, v) for u in range(30) for v in range(30) if u < v]
+    adjacency = build_adjacency(rng.sample(pairs, 150))
+    return sorted(sorted(c) for c in maximal_cliques(adjacency))
+
+
+def test_iter_community_file(tmp_path):
+    file_path = str(tmp_path / 'cliques')
+    write_cliques(file_path, [('a', 'b', 'c'), ('a', 'd', 'e')])
+    assert list(iter_community_file(file_path)) == [
+            (0, ('a', 'b', 'c')), (1, ('a', 'd', 'e'))]
+
+
+def test_clique_adjacency(tmp_path):
+    file_path = str(tmp_path / 'cliques')
+    write_cliques(file_path, [(1, 2, 3), (2, 3, 4), (3, 4, 5, 6), (1, 5)])
+    assert list(clique_adjacency(file_path, 3, chunk_size=2)) == [
+            (0, 1, 2), (1, 2, 2)]
+
+
+@pytest.mark.parametrize('k', [3, 4])
+def test_clique_components_match_percolation(tmp_path, random_cliques, k):
+    file_path = str(tmp_path / 'cliques')
+    write_cliques(file_path, random_cliques)
+
+    cliques = {i: frozenset(c) for i, c in enumerate(random_cliques)}
+    vertex_cliques = {}
+    for i, clique in cliques.items():
+        for v in clique:
+            vertex_cliques.setdefault(v, set()).add(i)
+    expected = percolate(cliques, cliques, vertex_cliques, k)
+
+    results = clique_components(file_path, k, chunk_size=16,
+                                tmp_dir=str(tmp_path))
+    assert {frozenset(c) for c in results['cliques']} == {
+            frozenset(c) for c in expected}
+    assert results['community'] == list(range(len(expected)))
+    assert [p.name for p in tmp_path.iterdir()] == ['cliques']
+
+
+def test_clique_adjacency_hub_vertex(tmp_path):
+    file_path = str(tmp_path / 'cliques')
+    cliques = [(0, 1, i) for i in range(2, 12)]
+    write_cliques(file_path, cliques)
+    expected = [(a, b, 2) for a in range(10) for b in range(a + 1, 10)]
+    assert list(clique_adjacency(file_path, 3, chunk_size=3)) == expected
@@ -0,0 +1,117 @@
+import glob
+import os
+
+import pytest
+
+from py_cfinder.server import JobClient
+from py_cfinder.server import JobServer
+
+triangle_cliques = {
+        'clique': [0, 1],
+        'vertices': [('a', 'b', 'c'), ('a', 'd', 'e')]
+        }
+
+
+@pytest.fixture
+def server(fake_cfinder, tmp_path):
+    server = JobServer(str(tmp_path / 'server.sock'), workers=2,
+                       cache_dir=str(tmp_path / 'cache'))
+    server.start()
+    yield server
+    server.shutdown()
+
+
+def calls(server):
+    return glob.glob(os.path.join(server.cache_dir, '*', 'calls'))
+
+
+def test_find_job(server, fake_cfinder):
+    client = JobClient(server.address)
+    assert client.find(i=fake_cfinder) == triangle_cliques
+
+
+def test_find_job_result_is_mapped(server, fake_cfinder):
+    client = JobClient(server.address)
+    handle = client.result(client.submit('find', i=fake_cfinder))
+    with handle.attach() as shared:
+        vertices = shared.arrays['vertices']
+        assert vertices.tolist() == list('abcade')
+        assert not vertices.flags['OWNDATA']
+
+
+def test_find_jobs_get_own_output(server, fake_cfinder, tmp_path):
+    other_input = tmp_path / 'other.txt'
+    other_input.write_text('a b\na c\nb c\n')
+    client = JobClient(server.address)
+    job_ids = [client.submit('find', i=fake_cfinder),
+               client.submit('find', i=str(other_input))]
+    for job_id in job_ids:
+        client.result(job_id)
+    assert len(calls(server)) == 2
+
+
+def test_find_job_is_cached(server, fake_cfinder):
+    client = JobClient(server.address)
+    client.find(i=fake_cfinder)
+    os.remove(calls(server)[0])
+
+    job_id = client.submit('find', i=fake_cfinder)
+    assert client.status(job_id)['status'] == 'done'
+    assert client.result(job_id).to_dict() == triangle_cliques
+    assert calls(server) == []
+
+
+def test_identical_pending_jobs_share_a_run(fake_cfinder, tmp_path,
+                                            monkeypatch):
+    monkeypatch.setenv('FAKE_CFINDER_DELAY', '0.5')
+    server = JobServer(str(tmp_path / 'server.sock'), workers=2,
+                       cache_dir=str(tmp_path / 'cache'))
+    server.start()
+    try:
+        client = JobClient(server.address)
+        job_ids = [client.submit('find', i=fake_cfinder) for _ in range(2)]
+        for job_id in job_ids:
+            assert client.result(job_id).to_dict() == triangle_cliques
+        with open(calls(server)[0]) as f:
+            assert len(f.read().splitlines()) == 1
+
+        output_dir = os.path.join(server.cache_dir, 'output')
+        client.submit('find', i=fake_cfinder, o=output_dir)
+        with pytest.raises(RuntimeError):
+            client.submit('find', i=fake_cfinder, o=output_dir, t=10)
+        assert server._pending == 1
+    finally:
+        server.shutdown()
+
+
+def test_relative_paths(server, fake_cfinder, tmp_path, monkeypatch):
+    with pytest.raises(ValueError):
+        server.submit('find', {'i': os.path.basename(fake_cfinder)})
+
+    monkeypatch.chdir(tmp_path)
+    client = JobClient(server.address)
+    assert client.find(i=os.path.basename(fake_cfinder)) == triangle_cliques
+
+
+def test_output_outside_cache_is_refused(server, fake_cfinder, tmp_path):
+    client = JobClient(server.address)
+    with pytest.raises(RuntimeError):
+        client.submit('find', i=fake_cfinder, o=str(tmp_path / 'output'))
+    with pytest.raises(RuntimeError):
+        client.submit('find', i=fake_cfinder, delete_output=True)
+
+
+def test_finished_jobs_are_evicted(server, fake_cfinder):
+    server.retention = 0
+    client = JobClient(server.address)
+    job_id = client.submit('find', i=fake_cfinder)
+    client.result(job_id)
+    client.submit('find', i=fake_cfinder)
+    assert job_id not in server.jobs
+    assert server._pending == 0
+
+
+def test_unknown_method(server):
+    client = JobClient(server.address)
+    with pytest.raises(RuntimeError):
+        client.submit('rm', path='/')
@@ -0,0 +1,81 @@
+from multiprocessing import Pool
+
+import pytest
+
+from py_cfinder import shared
+from py_cfinder.shared import find_shared
+from py_cfinder.shared import share_results
+
+
+@pytest.fixture
+def triangle_results():
+    return {
+            'cliques': {'clique': [0, 1],
+                        'vertices': [('a', 'b', 'c'), ('a', 'd', 'e')]},
+            'graph': None,
+            3: {
+                'communities_cliques': {'community': [0, 1],
+                                        'cliques': [(0,), (1,)]},
+                'communities_links': {
+                    'community': [0, 1],
+                    'edges': [[('a', 'b'), ('a', 'c'), ('b', 'c')],
+                              [('a', 'd'), ('a', 'e'), ('d', 'e')]]},
+                'size_distribution': {'size': [3], 'count': [2]},
+                },
+            }
+
+
+def test_round_trip(triangle_results):
+    handle = share_results(triangle_results)
+    try:
+        assert handle.to_dict() == triangle_results
+    finally:
+        handle.unlink()
+
+
+def test_arrays(triangle_results):
+    handle = share_results(triangle_results)
+    try:
+        with handle.attach() as shared:
+            cliques = shared.arrays['cliques']
+            assert cliques['vertices'].tolist() == list('abcade')
+            assert cliques['vertices_offsets'].tolist() == [0, 3, 6]
+            assert shared.arrays[3]['communities_links']['edges'].shape == (
+                    6, 2)
+            assert not cliques['clique'].flags['OWNDATA']
+    finally:
+        handle.unlink()
+
+
+def test_find_shared_in_pool(fake_cfinder, tmp_path):
+    output_dirs = [str(tmp_path / 'output_{}'.format(n)) for n in range(2)]
+    with Pool(2) as pool:
+        handles = pool.starmap(
+                find_shared, [(fake_cfinder, o) for o in output_dirs])
+    for handle in handles:
+        try:
+            assert handle.to_dict() == {
+                    'clique': [0, 1],
+                    'vertices': [('a', 'b', 'c'), ('a', 'd', 'e')]}
+        finally:
+            handle.unlink()
+
+
+def test_failed_copy_frees_block(monkeypatch, triangle_results):
+    created = []
+    original = shared._open_shared_memory
+
+    def open_shared_memory(**kwargs):
+        shm = original(**kwargs)
+        created.append(shm.name)
+        return shm
+
+    def copy_arrays(*args):
+        raise RuntimeError('copy failed')
+
+    monkeypatch.setattr(shared, '_open_shared_memory', open_shared_memory)
+    monkeypatch.setattr(shared, '_copy_arrays', copy_arrays)
+    with pytest.raises(RuntimeError):
+        share_results(triangle_results)
+    with pytest.raises(FileNotFoundError):
+        original(name=created[0])